@@ -0,0 +1,3 @@
+"""
+Benchmarks for spatula, run with `python -m benchmarks`.
+"""
@@ -0,0 +1,152 @@
+"""
+Synthetic documents & a local HTTP server to serve them for benchmarking.
+
+Every list document contains `n` items, each with a name, a number, and a link to a
+detail page.  HTML list pages also link to the next page when `page < pages`.
+"""
+import csv
+import io
+import json
+import threading
+import typing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def html_list(n: int, page: int = 1, pages: int = 1) -> bytes:
+    rows = "".join(
+        f"<tr class='item'><td><a href='/html/detail/{i}'>Item {i}</a></td>"
+        f"<td class='num'>{i * 7}</td></tr>"
+        for i in range((page - 1) * n, page * n)
+    )
+    next_link = (
+        f"<a class='next' href='/html?n={n}&page={page + 1}&pages={pages}'>next</a>"
+        if page < pages
+        else ""
+    )
+    return (
+        f"<html><head><title>Page {page}</title></head><body>"
+        f"<table><tbody>{rows}</tbody></table>{next_link}</body></html>"
+    ).encode()
+
+
+def html_detail(i: int) -> bytes:
+    paragraphs = "".join(f"<p>paragraph {p} of item {i}</p>" for p in range(20))
+    return (
+        f"<html><body><h1>Item {i}</h1><dl><dt>Number</dt><dd id='num'>{i * 7}</dd>"
+        f"</dl>{paragraphs}</body></html>"
+    ).encode()
+
+
+def xml_list(n: int) -> bytes:
+    items = "".join(
+        f"<item><name>Item {i}</name><number>{i * 7}</number>"
+        f"<link>/html/detail/{i}</link></item>"
+        for i in range(n)
+    )
+    return f"<?xml version='1.0'?><items>{items}</items>".encode()
+
+
+def json_list(n: int) -> bytes:
+    return json.dumps(
+        [
+            {"name": f"Item {i}", "number": i * 7, "link": f"/html/detail/{i}"}
+            for i in range(n)
+        ]
+    ).encode()
+
+
+def csv_list(n: int) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["name", "number", "link"])
+    for i in range(n):
+        writer.writerow([f"Item {i}", i * 7, f"/html/detail/{i}"])
+    return buf.getvalue().encode()
+
+
+def xlsx_list(n: int) -> bytes:
+    from openpyxl import Workbook  # type: ignore
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["name", "number", "link"])
+    for i in range(n):
+        sheet.append([f"Item {i}", i * 7, f"/html/detail/{i}"])
+    buf = io.BytesIO()
+    workbook.save(buf)
+    return buf.getvalue()
+
+
+CONTENT_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "xml": "application/xml",
+    "json": "application/json",
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+LIST_GENERATORS: typing.Dict[str, typing.Callable[[int], bytes]] = {
+    "html": html_list,
+    "xml": xml_list,
+    "json": json_list,
+    "csv": csv_list,
+    "xlsx": xlsx_list,
+}
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers & body are written separately, avoid delayed-ACK stalls on keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {k: int(v[0]) for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        kind = parts[0]
+        if kind == "html" and len(parts) == 3 and parts[1] == "detail":
+            body = html_detail(int(parts[2]))
+        elif kind == "html" and len(parts) == 1:
+            body = html_list(
+                params.get("n", 100), params.get("page", 1), params.get("pages", 1)
+            )
+        elif kind in LIST_GENERATORS and len(parts) == 1:
+            body = LIST_GENERATORS[kind](params.get("n", 100))
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[kind])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: typing.Any) -> None:
+        pass
+
+
+class FixtureServer:
+    """
+    Serve synthetic fixtures from a background thread:
+
+    - `/html?n=<items>&page=<page>&pages=<pages>` paginated HTML list
+    - `/html/detail/<i>` HTML detail page
+    - `/xml?n=<items>`, `/json?n=<items>`, `/csv?n=<items>`, `/xlsx?n=<items>`
+    """
+
+    def __init__(self, port: int = 0):
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _FixtureHandler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def __enter__(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc: typing.Any) -> None:
+        self.server.shutdown()
+        self.server.server_close()
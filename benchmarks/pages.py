@@ -0,0 +1,84 @@
+"""
+Scrapers used by the benchmarks, written against the documents in `fixtures`.
+"""
+import dataclasses
+import typing
+from spatula import (
+    URL,
+    CSS,
+    NullSource,
+    Page,
+    XPath,
+    HtmlPage,
+    HtmlListPage,
+    XmlListPage,
+    JsonListPage,
+    CsvListPage,
+    ExcelListPage,
+)
+
+
+@dataclasses.dataclass
+class Item:
+    name: str
+    url: str
+    number: int
+
+
+class HtmlDetail(HtmlPage):
+    def process_page(self) -> typing.Dict[str, typing.Any]:
+        return {
+            "name": CSS("h1").match_one(self.root).text,
+            "number": CSS("#num").match_one(self.root).text,
+            "paragraphs": len(CSS("p").match(self.root)),
+        }
+
+
+class HtmlList(HtmlListPage):
+    selector = CSS("tr.item")
+
+    def process_item(self, item: typing.Any) -> typing.Any:
+        link = CSS("a").match_one(item)
+        return {"name": link.text, "number": CSS("td.num").match_one(item).text}
+
+    def get_next_source(self) -> typing.Optional[str]:
+        next_link = CSS("a.next", min_items=0).match(self.root)
+        return next_link[0].get("href") if next_link else None
+
+
+class HtmlListWithDetails(HtmlList):
+    def process_item(self, item: typing.Any) -> typing.Any:
+        return HtmlDetail(source=CSS("a").match_one(item).get("href"))
+
+
+class WideList(Page):
+    # yields every detail page at once, so a breadth-first scrape queues them all
+    source = NullSource()
+
+    def process_page(self) -> typing.Iterable[HtmlDetail]:
+        for i in range(self.input["n"]):
+            yield HtmlDetail(
+                {"i": i}, source=URL(self.input["base"] + f"/html/detail/{i}")
+            )
+
+
+class XmlList(XmlListPage):
+    selector = XPath("//item")
+
+    def process_item(self, item: typing.Any) -> typing.Any:
+        return {"name": item.findtext("name"), "number": item.findtext("number")}
+
+
+class JsonList(JsonListPage):
+    def process_item(self, item: typing.Any) -> typing.Any:
+        return item
+
+
+class CsvList(CsvListPage):
+    def process_item(self, item: typing.Any) -> typing.Any:
+        return item
+
+
+class ExcelList(ExcelListPage):
+    def process_item(self, item: typing.Any) -> typing.Any:
+        return {"name": item[0], "number": item[1]}
@@ -0,0 +1,117 @@
+"""
+Run the benchmark suite, print results, and save them for comparison across commits.
+
+    python -m benchmarks [--size small|medium|large] [--repeat N] [--compare FILE]
+
+Results are saved to `benchmarks/results/<commit>.json`.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import typing
+from pathlib import Path
+from .fixtures import FixtureServer
+from .suite import SIZES, Benchmark, get_benchmarks
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def measure(benchmark: Benchmark, repeat: int) -> typing.Dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        units = benchmark()
+        times.append(time.perf_counter() - start)
+    # memory is measured in a separate run since tracing slows execution
+    tracemalloc.start()
+    benchmark()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    best = min(times)
+    return {
+        "seconds": best,
+        "units": units,
+        "per_second": units / best if best else 0,
+        "peak_kb": peak / 1024,
+    }
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(
+    results: typing.Dict[str, typing.Dict[str, float]],
+    previous: typing.Optional[typing.Dict[str, typing.Dict[str, float]]] = None,
+) -> None:
+    header = f"{'benchmark':<24}{'seconds':>10}{'units/s':>14}{'peak KB':>12}"
+    if previous:
+        header += f"{'vs prev':>10}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<24}{result['seconds']:>10.4f}"
+            f"{result['per_second']:>14.1f}{result['peak_kb']:>12.1f}"
+        )
+        if previous and name in previous:
+            # >1.00x means faster than the previous run
+            line += f"{previous[name]['seconds'] / result['seconds']:>9.2f}x"
+        print(line)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "-k", dest="select", default="", help="only run benchmarks containing this"
+    )
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    with FixtureServer() as server:
+        benchmarks = get_benchmarks(server, args.size)
+        results = {
+            name: measure(benchmark, args.repeat)
+            for name, benchmark in benchmarks.items()
+            if args.select in name
+        }
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+    print_results(results, previous)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"max RSS: {max_rss / 1024:.1f} MB")
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        commit = current_commit()
+        path = RESULTS_DIR / f"{commit}.json"
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "commit": commit,
+                    "size": args.size,
+                    "python": sys.version.split()[0],
+                    "max_rss_kb": max_rss,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"saved results to {path}")
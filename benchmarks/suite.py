@@ -0,0 +1,159 @@
+"""
+Individual benchmarks, each is a callable that performs some work and returns the
+number of units (items, matches, etc.) processed so throughput can be computed.
+"""
+import contextlib
+import importlib.util
+import io
+import subprocess
+import sys
+import tempfile
+import typing
+from pathlib import Path
+import lxml.html  # type: ignore
+import requests
+from spatula import URL, Page, CSS, XPath, SimilarLink
+from spatula.cli import cli
+from spatula.output import DUMP_FUNCTIONS, ItemWriter
+from . import fixtures, pages
+
+Benchmark = typing.Callable[[], int]
+
+SIZES = {
+    # items per list document, pages of pagination, detail pages to follow
+    "small": {"n": 100, "pages": 5, "details": 50},
+    "medium": {"n": 1000, "pages": 10, "details": 200},
+    "large": {"n": 10000, "pages": 20, "details": 1000},
+}
+
+PARSE_PAGES: typing.Dict[str, typing.Type[Page]] = {
+    "html": pages.HtmlList,
+    "xml": pages.XmlList,
+    "json": pages.JsonList,
+    "csv": pages.CsvList,
+    "xlsx": pages.ExcelList,
+}
+
+
+def _response(kind: str, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = fixtures.CONTENT_TYPES[kind]
+    return response
+
+
+def parse_benchmark(kind: str, n: int) -> Benchmark:
+    body = fixtures.LIST_GENERATORS[kind](n)
+
+    def run() -> int:
+        page = PARSE_PAGES[kind](source=URL("http://127.0.0.1/"))
+        page.response = _response(kind, body)
+        page.postprocess_response()
+        return len(list(page.process_page()))
+
+    return run
+
+
+def selector_benchmark(selector: typing.Any, n: int) -> Benchmark:
+    root = lxml.html.fromstring(fixtures.html_list(n))
+    root.make_links_absolute("http://127.0.0.1/")
+
+    def run() -> int:
+        return len(selector.match(root))
+
+    return run
+
+
+def scrape_benchmark(page_name: str, source: str) -> Benchmark:
+    def run() -> int:
+        with tempfile.TemporaryDirectory() as tmpdir, contextlib.redirect_stdout(
+            io.StringIO()
+        ):
+            output_dir = Path(tmpdir) / "out"
+            cli.main(
+                [
+                    "scrape",
+                    page_name,
+                    "--source",
+                    source,
+                    "-o",
+                    str(output_dir),
+                    "--rpm",
+                    "0",
+                    "-v",
+                    "0",
+                ],
+                standalone_mode=False,
+            )
+            return len(list(output_dir.iterdir()))
+
+    return run
+
+
+def frontier_benchmark(base_url: str, n: int) -> Benchmark:
+    # peak memory is dominated by n pages waiting to be scraped
+    def run() -> int:
+        items = pages.WideList({"n": n, "base": base_url}).do_scrape(order="bfs")
+        next(iter(items))
+        return n
+
+    return run
+
+
+def output_benchmark(dump: str, n: int) -> Benchmark:
+    items = [pages.Item(f"item {i}", f"http://127.0.0.1/{i}", i) for i in range(n)]
+
+    def run() -> int:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with ItemWriter(Path(tmpdir), DUMP_FUNCTIONS[dump]) as writer:
+                for i, item in enumerate(items):
+                    writer.write(str(i), item)
+        return n
+
+    return run
+
+
+def startup_benchmark(code: str) -> Benchmark:
+    # a fresh interpreter each time, so module caching doesn't hide import cost
+    def run() -> int:
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+        return 1
+
+    return run
+
+
+def get_benchmarks(
+    server: fixtures.FixtureServer, size: str
+) -> typing.Dict[str, Benchmark]:
+    n, num_pages, details = (SIZES[size][k] for k in ("n", "pages", "details"))
+    benchmarks = {
+        "startup.python": startup_benchmark("pass"),
+        "startup.import": startup_benchmark("import spatula.cli"),
+    }
+    benchmarks.update(
+        {f"parse.{kind}": parse_benchmark(kind, n) for kind in PARSE_PAGES}
+    )
+    benchmarks.update(
+        {
+            "selector.css": selector_benchmark(CSS("tr.item a"), n),
+            "selector.xpath": selector_benchmark(XPath("//tr[@class='item']//a"), n),
+            "selector.similar_link": selector_benchmark(
+                SimilarLink(r"http://127.0.0.1/html/detail/\d+"), n
+            ),
+            "scrape.paginated": scrape_benchmark(
+                "benchmarks.pages.HtmlList",
+                server.url(f"/html?n={n}&pages={num_pages}"),
+            ),
+            "scrape.details": scrape_benchmark(
+                "benchmarks.pages.HtmlListWithDetails",
+                server.url(f"/html?n={details}"),
+            ),
+            "memory.frontier": frontier_benchmark(server.url(""), n * 10),
+            "output.json": output_benchmark("json", n),
+        }
+    )
+    if importlib.util.find_spec("orjson"):
+        benchmarks["output.orjson"] = output_benchmark("orjson", n)
+    return benchmarks
@@ -7,6 +7,7 @@ from .pages import (  # noqa
     ListPage,
     CsvListPage,
     ExcelListPage,
+    ArchiveListPage,
     HtmlListPage,
     JsonListPage,
     XmlListPage,
@@ -16,4 +17,14 @@ from .pages import (  # noqa
     RejectedResponse,
 )
 from .selectors import SelectorError, Selector, XPath, SimilarLink, CSS  # noqa
-from .sources import Source, URL, NullSource  # noqa
+from .sources import (  # noqa
+    Source,
+    URL,
+    NullSource,
+    FileSource,
+    DirectorySource,
+    ArchiveMember,
+    BatchSource,
+)
+from .hooks import add_hook, remove_hook  # noqa
+from .profiling import Profiler, PageStats  # noqa
@@ -0,0 +1,260 @@
+"""
+Append-only archive of raw HTTP responses, recorded during a scrape so that it can
+later be replayed without making any requests.
+
+The archive is a series of gzip members, one per response, so the file as a whole
+is a valid gzip file that can be appended to safely.  Each member contains a JSON
+header line followed by the (decoded) response body.
+
+Alongside the archive, `<path>.idx` holds one JSON line per response recording its
+request fingerprint and the offset & length of its gzip member, so any response can
+be read without decompressing the rest of the archive.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import typing
+from requests.adapters import BaseAdapter
+from .sources import SPOOL_CHUNK_SIZE, _spool
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    import requests
+
+# bodies are stored decoded, so headers describing the transfer no longer apply
+_TRANSFER_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+IndexEntry = typing.Dict[str, typing.Any]
+
+
+def request_fingerprint(
+    method: str, url: str, body: typing.Union[None, str, bytes] = None
+) -> str:
+    """
+    key identifying a request, two requests with the same fingerprint are expected
+    to receive the same response
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{method.upper()} {url}\n".encode())
+    if isinstance(body, str):
+        body = body.encode()
+    if body:
+        h.update(body)
+    return h.hexdigest()
+
+
+class ResponseArchive:
+    """
+    An append-only, compressed, indexed archive of HTTP responses.
+
+    Can be used as a context manager, closing the underlying files on exit.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = path + ".idx"
+        self._lock = threading.Lock()
+        self._archive: typing.Optional[typing.BinaryIO] = None
+        self._index_file: typing.Optional[typing.TextIO] = None
+        self._reader: typing.Optional[typing.BinaryIO] = None
+        self._index: typing.Optional[typing.Dict[str, IndexEntry]] = None
+
+    def __enter__(self) -> "ResponseArchive":
+        return self
+
+    def __exit__(self, *exc: typing.Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for f in (self._archive, self._index_file, self._reader):
+                if f:
+                    f.close()
+            self._archive = self._index_file = self._reader = None
+
+    @property
+    def index(self) -> typing.Dict[str, IndexEntry]:
+        """
+        mapping of request fingerprint to index entry, the most recently recorded
+        response wins if a request was made more than once
+        """
+        with self._lock:
+            if self._index is None:
+                self._index = {}
+                if os.path.exists(self.index_path):
+                    with open(self.index_path) as f:
+                        for line in f:
+                            entry = json.loads(line)
+                            self._index[entry["fingerprint"]] = entry
+            return self._index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self.index
+
+    def append(self, response: "requests.Response") -> None:
+        """
+        record a response (and the request that it was the result of)
+
+        The body of a response with a `spool` (see `URL(stream=True)`) is
+        compressed from the spool in chunks, rather than read into memory.
+        """
+        request = response.request
+        method = request.method or "GET"
+        url = request.url or response.url
+        fingerprint = request_fingerprint(method, url, request.body)  # type: ignore
+        header = {
+            "fingerprint": fingerprint,
+            "method": method,
+            "url": url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {
+                k: v
+                for k, v in response.headers.items()
+                if k.lower() not in _TRANSFER_HEADERS
+            },
+            "encoding": response.encoding,
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        header_line = json.dumps(header).encode() + b"\n"
+        spool = getattr(response, "spool", None)
+        record = b""
+        if spool is None:
+            record = gzip.compress(header_line + response.content, compresslevel=6)
+
+        with self._lock:
+            if self._archive is None:
+                self._archive = open(self.path, "ab")
+                self._index_file = open(self.index_path, "a")
+            offset = self._archive.tell()
+            if spool is None:
+                self._archive.write(record)
+            else:
+                spool.seek(0)
+                with gzip.GzipFile(
+                    filename="", mode="wb", compresslevel=6, fileobj=self._archive
+                ) as member:
+                    member.write(header_line)
+                    shutil.copyfileobj(spool, member, SPOOL_CHUNK_SIZE)
+                spool.seek(0)
+            # the record is complete on disk before the index refers to it
+            self._archive.flush()
+            entry = {
+                "fingerprint": fingerprint,
+                "method": method,
+                "url": url,
+                "status": response.status_code,
+                "offset": offset,
+                "length": self._archive.tell() - offset,
+            }
+            self._index_file.write(json.dumps(entry) + "\n")  # type: ignore
+            self._index_file.flush()  # type: ignore
+            if self._index is not None:
+                self._index[fingerprint] = entry
+
+    def get(self, fingerprint: str) -> typing.Optional["requests.Response"]:
+        """
+        read the response recorded for a request fingerprint, None if there is none
+        """
+        import requests
+        from requests.structures import CaseInsensitiveDict
+
+        entry = self.index.get(fingerprint)
+        if entry is None:
+            return None
+        with self._lock:
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(entry["offset"])
+            data = self._reader.read(entry["length"])
+        record = gzip.decompress(data)
+        header_line, body = record.split(b"\n", 1)
+        header = json.loads(header_line)
+
+        response = requests.Response()
+        response.status_code = header["status"]
+        response.reason = header["reason"]
+        response.url = header["url"]
+        response.headers = CaseInsensitiveDict(header["headers"])
+        response.encoding = header["encoding"]
+        response._content = body
+        # there is no connection to release
+        response._content_consumed = True  # type: ignore
+        return response
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    transport adapter that records every response received by another adapter
+    """
+
+    def __init__(self, archive: ResponseArchive, adapter: BaseAdapter):
+        super().__init__()
+        self.archive = archive
+        self.adapter = adapter
+
+    def send(  # type: ignore
+        self, request: "requests.PreparedRequest", **kwargs: typing.Any
+    ) -> "requests.Response":
+        response = self.adapter.send(request, **kwargs)
+        if kwargs.get("stream"):
+            # spooled here rather than by URL(stream=True), so that the body is
+            # recorded from disk without being held in memory
+            _spool(response)
+        self.archive.append(response)
+        return response
+
+    def close(self) -> None:
+        self.adapter.close()
+
+
+def record_responses(session: "requests.Session", archive: ResponseArchive) -> None:
+    """
+    record all HTTP(S) responses received by `session` (e.g. a `Scraper`) to `archive`
+    """
+    for prefix in ("https://", "http://"):
+        session.mount(prefix, RecordingAdapter(archive, session.get_adapter(prefix)))
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    transport adapter that serves responses from an archive instead of making
+    requests, a request that was never recorded raises `requests.ConnectionError`
+    """
+
+    def __init__(self, archive: ResponseArchive):
+        super().__init__()
+        self.archive = archive
+
+    def send(  # type: ignore
+        self, request: "requests.PreparedRequest", **kwargs: typing.Any
+    ) -> "requests.Response":
+        import requests
+
+        method = request.method or "GET"
+        fingerprint = request_fingerprint(method, request.url, request.body)  # type: ignore
+        response = self.archive.get(fingerprint)
+        if response is None:
+            raise requests.ConnectionError(
+                f"no response to {method} {request.url} in {self.archive.path}",
+                request=request,
+            )
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+def replay_responses(session: "requests.Session", archive: ResponseArchive) -> None:
+    """
+    serve all HTTP(S) requests made by `session` from `archive`
+    """
+    for prefix in ("https://", "http://"):
+        session.mount(prefix, ReplayAdapter(archive))
@@ -0,0 +1,94 @@
+import collections
+import json
+import typing
+from .pages import Page, _to_scout_result
+from .utils import _content_hash
+
+# key -> (hash of data, __next__)
+ScoutIndex = typing.Dict[str, typing.Tuple[str, typing.Optional[str]]]
+
+
+def load_scout_records(path: str) -> typing.Iterable[typing.Dict[str, typing.Any]]:
+    """
+    read records written by `spatula scout` in either JSON or JSON Lines format
+    """
+    with open(path) as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from json.load(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def index_scout_records(
+    records: typing.Iterable[typing.Dict[str, typing.Any]]
+) -> ScoutIndex:
+    """
+    build a compact index of scout records, keyed by the subpage they lead to
+
+    records that don't lead to a subpage, or where several records lead to the same
+    subpage (e.g. a source that depends on input), are keyed by the hash of their data
+    """
+    by_next: typing.Dict[
+        typing.Optional[str], typing.Set[str]
+    ] = collections.defaultdict(set)
+    for record in records:
+        data_hash = record.get("__hash__") or _content_hash(record["data"])
+        by_next[record["__next__"]].add(data_hash)
+
+    index: ScoutIndex = {}
+    for next_, hashes in by_next.items():
+        if next_ is not None and len(hashes) == 1:
+            index[next_] = (hashes.pop(), next_)
+        else:
+            for data_hash in hashes:
+                key = data_hash if next_ is None else f"{next_} #{data_hash}"
+                index[key] = (data_hash, next_)
+    return index
+
+
+def diff_scout_indexes(
+    previous: ScoutIndex, current: ScoutIndex
+) -> typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]]:
+    """
+    compare two scout indexes, returning lists of added, removed, and changed entries
+    """
+
+    def entry(key: str, index: ScoutIndex) -> typing.Dict[str, typing.Any]:
+        data_hash, next_ = index[key]
+        return {"key": key, "__next__": next_, "__hash__": data_hash}
+
+    return {
+        "added": [entry(k, current) for k in current if k not in previous],
+        "removed": [entry(k, previous) for k in previous if k not in current],
+        "changed": [
+            entry(k, current)
+            for k in current
+            if k in previous and current[k][0] != previous[k][0]
+        ],
+    }
+
+
+def changed_page_filter(diff_path: str) -> typing.Callable[[Page], bool]:
+    """
+    load a diff written by `spatula scout --compare` and return a function that
+    is True for subpages whose scout record was added or changed
+    """
+    with open(diff_path) as f:
+        diff = json.load(f)
+    wanted = {
+        (entry["__next__"], entry["__hash__"])
+        for entry in diff["added"] + diff["changed"]
+        if entry["__next__"] is not None
+    }
+
+    def follow(page: Page) -> bool:
+        record = _to_scout_result(page)
+        return (record["__next__"], _content_hash(record["data"])) in wanted
+
+    return follow
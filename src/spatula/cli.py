@@ -1,27 +1,123 @@
+import contextlib
+import copy
 import dataclasses
 import datetime
 import functools
 import importlib
+import importlib.util
 import inspect
 import json
 import logging
 import sys
+import textwrap
 import typing
 import uuid
 import shutil
 from pathlib import Path
 from types import ModuleType
-import lxml.html  # type: ignore
 import click
-from scrapelib import Scraper, SQLiteCache
-from .utils import _display, _obj_to_dict, attr_has, attr_fields
-from .sources import URL, Source
-from .pages import Page, ListPage
+from .utils import _display, _obj_to_dict, _content_hash, attr_has, attr_fields
+from .sources import URL, Source, FileSource, DirectorySource
+from .pages import Page, ListPage, ORDERS, _iter_pages
+from .profiling import Profiler
+from .output import (
+    DUMP_FUNCTIONS,
+    LAYOUTS,
+    DumpFunction,
+    ItemWriter,
+    item_key,
+    item_path,
+    key_filename,
+    load_manifest,
+    MANIFEST,
+    TOMBSTONES,
+)
+from .changes import (
+    load_scout_records,
+    index_scout_records,
+    diff_scout_indexes,
+    changed_page_filter,
+)
+
+# HTTP & parsing libraries are imported within commands to keep startup fast
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .scraper import Scraper
 
 
 VERSION = "1.0.0"
 
 
+SCRAPER_OPTIONS = "spatula.scraper_options"
+
+
+def get_scraper(
+    header: typing.Sequence[str] = (),
+    retries: int = 0,
+    retry_wait: int = 10,
+    rpm: int = 60,
+    adaptive: bool = False,
+    max_rpm: int = 600,
+    http2: bool = False,
+    pool_size: int = 10,
+    timeout: int = 5,
+    user_agent: str = f"spatula {VERSION}",
+    verify: bool = True,
+    fastmode: bool = False,
+    replay: typing.Optional[str] = None,
+) -> "Scraper":
+    """
+    build a scraper configured by the options of `scraper_params`
+    """
+    from scrapelib import SQLiteCache
+    from .scraper import Scraper
+
+    scraper = Scraper(
+        requests_per_minute=rpm,
+        retry_attempts=retries,
+        retry_wait_seconds=retry_wait,
+        verify=verify,
+    )
+    if http2 or pool_size != 10:
+        from .transport import configure_transport
+
+        try:
+            configure_transport(scraper, http2=http2, pool_size=pool_size)
+        except ImportError:
+            # httpx or h2 missing, or too old a version of httpx
+            click.secho(
+                "--http2 requires httpx 0.27 or later with HTTP/2 support, see "
+                "`pip install spatula[http2]`",
+                fg="red",
+            )
+            sys.exit(1)
+    scraper.timeout = timeout
+    scraper.user_agent = user_agent
+    # only update headers, don't overwrite defaults
+    scraper.headers.update(
+        {k.strip(): v.strip() for k, v in [h.split(":") for h in header]}
+    )
+    if fastmode:
+        scraper.cache_storage = SQLiteCache("spatula-cache.db")
+        scraper.cache_write_only = False
+    if adaptive and not replay:
+        from .scraper import AdaptiveThrottle, throttle_requests
+
+        throttle = AdaptiveThrottle(rpm or 60, max_requests_per_minute=max_rpm)
+        throttle_requests(scraper, throttle)
+    if replay:
+        from .archive import ResponseArchive, replay_responses
+
+        archive = ResponseArchive(replay)
+        # worker processes have no context, their archive is closed on exit
+        ctx = click.get_current_context(silent=True)
+        if ctx:
+            ctx.call_on_close(archive.close)
+        replay_responses(scraper, archive)
+        # nothing to be polite to
+        scraper.requests_per_minute = 0
+    return scraper
+
+
 def scraper_params(func: typing.Callable) -> typing.Callable:
     @functools.wraps(func)
     @click.option(
@@ -31,6 +127,28 @@ def scraper_params(func: typing.Callable) -> typing.Callable:
         help="override default user-agent",
     )
     @click.option("--rpm", default=60, help="set requests per minute (default: 60)")
+    @click.option(
+        "--adaptive",
+        is_flag=True,
+        help="adjust the rate & concurrency of requests to each host as it responds, "
+        "starting from --rpm",
+    )
+    @click.option(
+        "--max-rpm",
+        default=600,
+        help="highest requests per minute to each host with --adaptive (default: 600)",
+    )
+    @click.option(
+        "--http2",
+        is_flag=True,
+        help="make HTTPS requests with HTTP/2 where supported (requires httpx)",
+    )
+    @click.option(
+        "--pool-size",
+        default=10,
+        help="connections to keep open to each host, or in total with --http2 "
+        "(default: 10)",
+    )
     @click.option(
         "--timeout", default=5, help="set HTTP request timeout in seconds (default: 5)"
     )
@@ -64,33 +182,48 @@ def scraper_params(func: typing.Callable) -> typing.Callable:
         help="use a cache to avoid making unnecessary requests",
         is_flag=True,
     )
+    @click.option(
+        "--replay",
+        type=click.Path(exists=True, dir_okay=False),
+        default=None,
+        help="serve responses from an archive written by --archive or --record, "
+        "instead of making requests",
+    )
     def newfunc(
         header: typing.List[str],
         retries: int,
         retry_wait: int,
         rpm: int,
+        adaptive: bool,
+        max_rpm: int,
+        http2: bool,
+        pool_size: int,
         timeout: int,
         user_agent: str,
         verbosity: int,
         verify: bool,
         fastmode: bool,
+        replay: typing.Optional[str],
         **kwargs: str,
     ) -> None:
-        scraper = Scraper(
-            requests_per_minute=rpm,
-            retry_attempts=retries,
-            retry_wait_seconds=retry_wait,
+        options: typing.Dict[str, typing.Any] = dict(
+            header=header,
+            retries=retries,
+            retry_wait=retry_wait,
+            rpm=rpm,
+            adaptive=adaptive,
+            max_rpm=max_rpm,
+            http2=http2,
+            pool_size=pool_size,
+            timeout=timeout,
+            user_agent=user_agent,
             verify=verify,
+            fastmode=fastmode,
+            replay=replay,
         )
-        scraper.timeout = timeout
-        scraper.user_agent = user_agent
-        # only update headers, don't overwrite defaults
-        scraper.headers.update(
-            {k.strip(): v.strip() for k, v in [h.split(":") for h in header]}
-        )
-        if fastmode:
-            scraper.cache_storage = SQLiteCache("spatula-cache.db")
-            scraper.cache_write_only = False
+        scraper = get_scraper(**options)
+        # so that commands can build the same scraper in other processes
+        click.get_current_context().meta[SCRAPER_OPTIONS] = options
 
         if verbosity == -1:
             level = logging.INFO if func.__name__ != "test" else logging.DEBUG
@@ -131,9 +264,9 @@ def get_page_class(dotted_name: str) -> type:
     return Cls
 
 
-def get_dump_function(
-    dotted_name: str,
-) -> typing.Callable[[typing.Optional[dict], typing.IO], None]:
+def get_dump_function(dotted_name: str) -> DumpFunction:
+    if dotted_name in DUMP_FUNCTIONS:
+        return DUMP_FUNCTIONS[dotted_name]
     mod_name, func_name = dotted_name.rsplit(".", 1)
     mod = import_mod(mod_name)
     func = getattr(mod, func_name)
@@ -176,13 +309,132 @@ def get_pages(dotted_name: str, source: typing.Optional[str]) -> typing.List[Pag
             return [Cls(source=source)]
 
 
-def get_new_filename(obj: typing.Any) -> str:
+def get_new_filename(obj: typing.Any, key: typing.Optional[str] = None) -> str:
     if hasattr(obj, "get_filename"):
         return obj.get_filename()
+    elif key is not None:
+        return key_filename(key)
     else:
         return str(uuid.uuid4())
 
 
+@functools.lru_cache(maxsize=None)
+def _warn_unstable_filenames() -> None:
+    # once per process
+    click.secho(
+        "some items have no key (see --dedupe-key) or get_filename(), with --update "
+        "they are written to a new file on every scrape and their previous files "
+        "are removed",
+        fg="yellow",
+    )
+
+
+def _output_entry(
+    item: typing.Any,
+    key_field: typing.Optional[str],
+    layout: str,
+    stable_names: bool = False,
+) -> typing.Tuple[str, typing.Any, typing.Optional[str]]:
+    """
+    filename, data & key to write an item with, if `stable_names` is set a warning
+    is shown when an item's filename will differ on every scrape
+
+    The item is converted to a dict here, before it's queued to be written, since
+    a page may go on to modify an item after yielding it.
+    """
+    key = item_key(item, key_field)
+    if stable_names and key is None and not hasattr(item, "get_filename"):
+        _warn_unstable_filenames()
+    name = item_path(get_new_filename(item, key), item, layout)
+    data = _obj_to_dict(item)
+    if data is item:
+        # dataclasses & attrs are copied by conversion, dicts must be copied here
+        data = copy.deepcopy(data)
+    return name, data, key
+
+
+def _scrape_file(
+    path: str,
+    templates: typing.List[Page],
+    scraper: "Scraper",
+    *,
+    order: str,
+    follow: typing.Optional[typing.Callable[[Page], bool]],
+    key_field: typing.Optional[str],
+    layout: str,
+    stable_names: bool,
+) -> typing.List[typing.Tuple[str, typing.Any, typing.Optional[str]]]:
+    """
+    scrape a single local file with each of the template pages, returning the
+    filename, data & key that would be written for each item
+    """
+    results = []
+    for template in templates:
+        page = type(template)(template.input, source=FileSource(path))
+        for item in page._to_items(scraper, order=order, follow=follow):
+            results.append(_output_entry(item, key_field, layout, stable_names))
+    return results
+
+
+# pages, scraper & follow filter of a --source-dir worker process
+_worker: typing.Dict[str, typing.Any] = {}
+
+
+def _init_worker(
+    initial_page_name: str,
+    scraper_options: typing.Dict[str, typing.Any],
+    only_changed: typing.Optional[str],
+) -> None:
+    # the scraper is configured exactly as it is in the main process
+    _worker["templates"] = get_pages(initial_page_name, None)
+    _worker["scraper"] = get_scraper(**scraper_options)
+    _worker["follow"] = changed_page_filter(only_changed) if only_changed else None
+
+
+def _scrape_file_in_worker(
+    path: str, **kwargs: typing.Any
+) -> typing.List[typing.Tuple[str, typing.Any, typing.Optional[str]]]:
+    return _scrape_file(
+        path,
+        _worker["templates"],
+        _worker["scraper"],
+        follow=_worker["follow"],
+        **kwargs,
+    )
+
+
+def _scrape_directory(
+    initial_page_name: str,
+    source: DirectorySource,
+    scraper: "Scraper",
+    *,
+    workers: int,
+    scraper_options: typing.Dict[str, typing.Any],
+    only_changed: typing.Optional[str],
+    **kwargs: typing.Any,
+) -> typing.Iterable[typing.Tuple[str, typing.Any, typing.Optional[str]]]:
+    paths = [file_source.path for file_source in source]
+    if workers <= 1:
+        templates = get_pages(initial_page_name, None)
+        follow = changed_page_filter(only_changed) if only_changed else None
+        for path in paths:
+            yield from _scrape_file(path, templates, scraper, follow=follow, **kwargs)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # parsing is CPU-bound, so files are spread across processes in chunks
+    chunksize = max(1, min(100, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(
+        workers,
+        initializer=_init_worker,
+        initargs=(initial_page_name, scraper_options, only_changed),
+    ) as executor:
+        scrape_file = functools.partial(_scrape_file_in_worker, **kwargs)
+        for results in executor.map(scrape_file, paths, chunksize=chunksize):
+            yield from results
+
+
 @click.group()
 @click.version_option(version=VERSION)
 def cli() -> None:
@@ -193,7 +445,7 @@ def cli() -> None:
 @click.argument("url")
 @click.option("-X", "--verb", default="GET", help="set HTTP verb such as POST")
 @scraper_params
-def shell(url: str, verb: str, scraper: Scraper) -> None:
+def shell(url: str, verb: str, scraper: "Scraper") -> None:
     """
     Start a session to interact with a particular page.
     """
@@ -203,6 +455,8 @@ def shell(url: str, verb: str, scraper: Scraper) -> None:
         click.secho("shell command requires IPython", fg="red")
         return
 
+    import lxml.html  # type: ignore
+
     # import selectors so they can be used without import
     from .selectors import SelectorError, XPath, SimilarLink, CSS  # noqa
 
@@ -279,6 +533,12 @@ def _get_fake_input(Cls: type, data: typing.List[str], interactive: bool) -> typ
     default=False,
     help="Determine whether subpages should be scraped. (Default: false)",
 )
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="record responses to this archive, so later runs can use --replay",
+)
 @scraper_params
 def test(
     class_name: str,
@@ -287,7 +547,8 @@ def test(
     source: typing.Optional[str],
     pagination: bool,
     subpages: bool,
-    scraper: Scraper,
+    record: typing.Optional[str],
+    scraper: "Scraper",
 ) -> None:
     """
     Scrape a single page and see output immediately.
@@ -307,7 +568,17 @@ def test(
     ```
 
     This will run the scraper defined at `path.to.ClassName` against the provided URL.
+
+    To avoid re-fetching pages each time, run once with `--record responses.gz`
+    and then use `--replay responses.gz` while iterating on the scraper.
     """
+    if record:
+        from .archive import ResponseArchive, record_responses
+
+        archive = ResponseArchive(record)
+        click.get_current_context().call_on_close(archive.close)
+        record_responses(scraper, archive)
+
     Cls = get_page_class(class_name)
     source_obj: typing.Optional[Source] = None
 
@@ -379,19 +650,165 @@ def test(
     "--rmdir/--no-rmdir", default=False, help="remove output directory before scrape."
 )
 @click.option("-s", "--source", help="Provide (or override) source URL")
-@click.option("--dump", help="Specify dump function", default="json.dump")
+@click.option(
+    "--dump",
+    default="json",
+    help="Specify dump function: json, orjson (if installed), or the dotted path "
+    "of a function like json.dump [default: json]",
+)
+@click.option(
+    "--dedupe",
+    is_flag=True,
+    help="only write the first of several items with the same key, or the same "
+    "content for items without a key",
+)
+@click.option(
+    "--dedupe-key",
+    default=None,
+    help="field identifying items without a get_key() method, used by --dedupe and "
+    "to give each item's file the same name on every scrape",
+)
+@click.option(
+    "--skip-unchanged",
+    is_flag=True,
+    help="allow writing into a non-empty output directory, leaving files that are "
+    "unchanged untouched (requires stable filenames, see --dedupe-key)",
+)
+@click.option(
+    "--update",
+    is_flag=True,
+    help="update the output of a previous scrape in --output-dir, writing only new & "
+    "changed items and removing items that no longer exist",
+)
+@click.option(
+    "--layout",
+    type=click.Choice(LAYOUTS),
+    default="flat",
+    help="write every item to the output directory (flat), or spread them across "
+    "subdirectories by a hash of their filename (hash) or their type (type)",
+)
+@click.option(
+    "--manifest/--no-manifest",
+    default=None,
+    help="write manifest.jsonl listing every item in the output "
+    "[default: only with --layout hash or type]",
+)
+@click.option(
+    "--queue-size",
+    default=1000,
+    help="maximum number of items waiting to be written, the scrape pauses when "
+    "this many are queued (default: 1000)",
+)
+@click.option(
+    "--fsync",
+    default=0,
+    help="flush written files to disk with fsync in batches of this many items "
+    "(default: 0, never)",
+)
+@click.option(
+    "--order",
+    type=click.Choice(ORDERS),
+    default="dfs",
+    help="order in which subpages are scraped (default: dfs)",
+)
+@click.option(
+    "--workers",
+    default=1,
+    help="number of initial pages to scrape concurrently, when a module contains "
+    "several, or processes to use with --source-dir (default: 1)",
+)
+@click.option(
+    "--source-dir",
+    type=click.Path(exists=True, file_okay=False),
+    default=None,
+    help="scrape each file in this directory (such as previously saved responses) "
+    "with the initial page instead of fetching its source",
+)
+@click.option(
+    "--source-pattern",
+    default="*",
+    help="glob pattern selecting files within --source-dir, use **/ to include "
+    "subdirectories [default: *]",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="print per-page timing statistics and write them to <output-dir>.profile.json",
+)
+@click.option(
+    "--metrics-port",
+    type=int,
+    default=None,
+    help="serve Prometheus metrics at http://<host>:<port>/metrics during the scrape",
+)
+@click.option(
+    "--only-changed",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="only follow subpages of the initial page that were added or changed in "
+    "this diff, written by `spatula scout --compare`",
+)
+@click.option(
+    "--archive",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="record every response to this (append-only, compressed) archive file",
+)
 @scraper_params
 def scrape(
     initial_page_name: str,
     output_dir: str,
     rmdir: bool,
     source: typing.Optional[str],
-    scraper: Scraper,
+    scraper: "Scraper",
     dump: str,
+    dedupe: bool,
+    dedupe_key: typing.Optional[str],
+    skip_unchanged: bool,
+    update: bool,
+    layout: str,
+    manifest: typing.Optional[bool],
+    queue_size: int,
+    fsync: int,
+    order: str,
+    workers: int,
+    profile: bool,
+    metrics_port: typing.Optional[int],
+    only_changed: typing.Optional[str],
+    source_dir: typing.Optional[str],
+    source_pattern: str,
+    archive: typing.Optional[str],
 ) -> None:
     """
     Run full scrape, and output data to disk.
+
+    With --source-dir, files that have already been downloaded are processed
+    instead, with --workers setting the number of processes to spread them across.
+    Each process makes any requests with its own scraper, configured the same way.
+
+    Items are written by a background thread, if the scrape is interrupted with
+    Ctrl-C every item scraped so far is still written before exiting.
+
+    With --update, the hashes stored in the manifest of a previous scrape are
+    used to write only what has changed.  Items that weren't scraped again are
+    deleted and listed in tombstones.jsonl (unless the scrape didn't complete, or
+    only some subpages were followed with --only-changed).
     """
+    if update and not output_dir:
+        click.secho("--update requires --output-dir", fg="red")
+        sys.exit(1)
+    if source_dir and workers > 1:
+        # these only observe the main process, not the worker processes
+        for option, value in (
+            ("--profile", profile),
+            ("--metrics-port", metrics_port is not None),
+            ("--archive", archive),
+        ):
+            if value:
+                click.secho(
+                    f"{option} can't be used with --source-dir and --workers", fg="red"
+                )
+                sys.exit(1)
     # ensure output directory is ready
     if not output_dir:
         dirn = 1
@@ -408,7 +825,7 @@ def scrape(
         try:
             output_path.mkdir(parents=True)
         except FileExistsError:
-            if len(list(output_path.iterdir())):
+            if len(list(output_path.iterdir())) and not (skip_unchanged or update):
                 if rmdir:
                     click.secho(f"{output_dir} exists and was cleared", fg="red")
                     shutil.rmtree(output_dir)
@@ -417,18 +834,113 @@ def scrape(
                     click.secho(f"{output_dir} exists and is not empty", fg="red")
                     sys.exit(1)
 
+    if dump == "orjson" and not importlib.util.find_spec("orjson"):
+        click.secho("--dump orjson requires orjson", fg="red")
+        sys.exit(1)
     dump_func = get_dump_function(dump)
+    previous = None
+    if update:
+        if (output_path / MANIFEST).exists():
+            previous = load_manifest(output_path)
+        elif any(output_path.iterdir()):
+            click.secho(
+                f"{output_path} has no {MANIFEST}, --update requires a directory "
+                "written with --manifest or --update",
+                fg="red",
+            )
+            sys.exit(1)
+        else:
+            previous = {}
     # actually do the scrape
-    count = 0
     pages = get_pages(initial_page_name, source)
-    for initial_page in pages:
-        for item in initial_page._to_items(scraper):
-            filename = output_path / (get_new_filename(item) + ".json")
-            data = _obj_to_dict(item)
-            with open(filename, "w") as f:
-                dump_func(data, f)
-            count += 1
-    click.secho(f"success: wrote {count} objects to {output_path}", fg="green")
+    profiler = Profiler() if profile else None
+    follow = changed_page_filter(only_changed) if only_changed else None
+    interrupted = False
+    with contextlib.ExitStack() as stack:
+        if profiler:
+            stack.enter_context(profiler)
+        if metrics_port is not None:
+            from .metrics import MetricsCollector, serve_metrics
+
+            collector = stack.enter_context(MetricsCollector())
+            server = serve_metrics(collector, metrics_port)
+            stack.callback(server.server_close)
+            stack.callback(server.shutdown)
+            click.secho(
+                f"serving metrics on port {server.server_address[1]}", fg="blue"
+            )
+        if archive:
+            from .archive import ResponseArchive, record_responses
+
+            record_responses(scraper, stack.enter_context(ResponseArchive(archive)))
+        # items are written on a background thread, the writer is closed before
+        # any of the other contexts so that every item is written
+        writer = stack.enter_context(
+            ItemWriter(
+                output_path,
+                dump_func,
+                max_queued=queue_size,
+                fsync=fsync,
+                dedupe=dedupe,
+                skip_unchanged=skip_unchanged,
+                manifest=layout != "flat" if manifest is None else manifest,
+                previous=previous,
+            )
+        )
+        outputs: typing.Iterable[typing.Tuple[str, typing.Any, typing.Optional[str]]]
+        if source_dir:
+            outputs = _scrape_directory(
+                initial_page_name,
+                DirectorySource(source_dir, source_pattern),
+                scraper,
+                workers=workers,
+                scraper_options=click.get_current_context().meta[SCRAPER_OPTIONS],
+                only_changed=only_changed,
+                order=order,
+                key_field=dedupe_key,
+                layout=layout,
+                stable_names=update,
+            )
+        else:
+            outputs = (
+                _output_entry(item, dedupe_key, layout, update)
+                for item in _iter_pages(
+                    pages, scraper, workers=workers, order=order, follow=follow
+                )
+            )
+        try:
+            for name, item, key in outputs:
+                writer.write(name, item, key)
+            if follow is not None:
+                # subpages that weren't followed still have items in the output,
+                # so nothing missing from this scrape is treated as removed
+                writer.close(complete=False)
+        except KeyboardInterrupt:
+            interrupted = True
+            click.secho("interrupted, writing remaining items", fg="yellow")
+            writer.close(complete=False)
+    if interrupted:
+        click.secho(
+            f"interrupted: wrote {writer.count} objects to {output_path}", fg="yellow"
+        )
+        sys.exit(130)
+    click.secho(f"success: wrote {writer.count} objects to {output_path}", fg="green")
+    if writer.duplicates:
+        click.secho(f"skipped {writer.duplicates} duplicate objects", fg="yellow")
+    if writer.unchanged:
+        click.secho(f"skipped {writer.unchanged} unchanged objects", fg="green")
+    if writer.removed:
+        click.secho(
+            f"removed {writer.removed} objects that are no longer present, "
+            f"see {output_path / TOMBSTONES}",
+            fg="yellow",
+        )
+    if profiler:
+        click.echo(profiler.summary())
+        report_path = output_path.with_name(output_path.name + ".profile.json")
+        with open(report_path, "w") as f:
+            json.dump(profiler.to_dict(), f, indent=2)
+        click.secho(f"wrote profile to {report_path}", fg="green")
 
 
 @cli.command()
@@ -440,12 +952,48 @@ def scrape(
     default="scout.json",
     help="override default output file [default: scout.json].",
 )
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["json", "jsonl"]),
+    default="json",
+    help="write a JSON array, or JSON Lines with one record per line (default: json)",
+)
+@click.option(
+    "--hash/--no-hash",
+    "add_hash",
+    default=False,
+    help="add a __hash__ of each record's data, for cheap comparison between runs",
+)
+@click.option(
+    "--workers",
+    default=1,
+    help="number of initial pages to scout concurrently, when a module contains "
+    "several (default: 1)",
+)
+@click.option(
+    "--compare",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="compare results against a previous scout output file and write the "
+    "differences to --diff-file",
+)
+@click.option(
+    "--diff-file",
+    default="scout-diff.json",
+    help="where to write differences found by --compare [default: scout-diff.json].",
+)
 @scraper_params
 def scout(
     initial_page_name: str,
     output_file: str,
+    output_format: str,
+    add_hash: bool,
+    workers: int,
+    compare: typing.Optional[str],
+    diff_file: str,
     source: typing.Optional[str],
-    scraper: Scraper,
+    scraper: "Scraper",
 ) -> None:
     """
     Run first step of scrape & output data to a JSON file.
@@ -458,14 +1006,51 @@ def scout(
     Of course in more advanced cases this depends upon the first page being scraped
     (typically a ListPage derivative) surfacing enough information (perhaps a
     last_updated date) to know whether any of the other pages have been scraped.
+
+    Records are written as they are scraped, so an interrupted scout still leaves a
+    valid file containing every record found so far.
+
+    With --compare, records are matched to a previous run by the subpage they lead
+    to, and added, removed, and changed records are written to --diff-file.  Pass
+    that file to `spatula scrape --only-changed` to scrape just those subpages.
     """
     initial_pages = get_pages(initial_page_name, source)
-    items: typing.List[typing.Any] = []
-    for initial_page in initial_pages:
-        items.extend(initial_page._to_items(scraper, scout=True))
+    # read before scouting, the previous file may be the one about to be overwritten
+    previous = index_scout_records(load_scout_records(compare)) if compare else None
+    hashes: typing.List[typing.Dict[str, typing.Any]] = []
+    count = 0
     with open(output_file, "w") as f:
-        json.dump(items, f, indent=2)
-    click.secho(f"success: wrote {len(items)} records to {output_file}", fg="green")
+        if output_format == "json":
+            f.write("[")
+        try:
+            for record in _iter_pages(
+                initial_pages, scraper, workers=workers, scout=True
+            ):
+                if add_hash or previous is not None:
+                    data_hash = _content_hash(record["data"])
+                    if add_hash:
+                        record["__hash__"] = data_hash
+                    if previous is not None:
+                        hashes.append(
+                            {"__next__": record["__next__"], "__hash__": data_hash}
+                        )
+                if output_format == "jsonl":
+                    f.write(json.dumps(record) + "\n")
+                else:
+                    # matches the output of json.dump(records, f, indent=2)
+                    f.write(",\n" if count else "\n")
+                    f.write(textwrap.indent(json.dumps(record, indent=2), "  "))
+                count += 1
+        finally:
+            if output_format == "json":
+                f.write("\n]" if count else "]")
+    click.secho(f"success: wrote {count} records to {output_file}", fg="green")
+    if previous is not None:
+        diff = diff_scout_indexes(previous, index_scout_records(hashes))
+        with open(diff_file, "w") as f:
+            json.dump(diff, f, indent=2)
+        summary = ", ".join(f"{len(v)} {k}" for k, v in diff.items())
+        click.secho(f"compared to {compare}: {summary}, wrote {diff_file}", fg="blue")
 
 
 if __name__ == "__main__":  # pragma: no cover
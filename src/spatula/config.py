@@ -2,3 +2,5 @@ import os
 
 REJECTED_RESPONSE_RETRIES = int(os.environ.get("SPATULA_REJECTED_RESPONSE_RETRIES", 1))
 RETRY_WAIT_SECONDS = float(os.environ.get("SPATULA_RETRY_WAIT_SECONDS", 5))
+# drop responses & parsed documents once a page has been processed
+RELEASE_RESPONSES = os.environ.get("SPATULA_RELEASE_RESPONSES", "") not in ("", "0")
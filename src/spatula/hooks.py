@@ -0,0 +1,79 @@
+import contextvars
+import typing
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .pages import Page
+
+Hook = typing.Callable[..., None]
+
+_hooks: typing.List[Hook] = []
+# page whose code is currently running, used to attribute events such as selector
+# matches that don't otherwise know which page they belong to
+_current_page: "contextvars.ContextVar[typing.Optional[Page]]" = (
+    contextvars.ContextVar("spatula_current_page", default=None)
+)
+
+
+def add_hook(hook: Hook) -> None:
+    """
+    Register a function to be called as events occur during a scrape.
+
+    Hooks are called as `hook(event, page, **data)`, where `page` is the `Page`
+    instance responsible for the event and `event` is one of:
+
+    `"fetch"`
+    :   `source.get_response` returned or raised an HTTP error,
+        `data` contains `seconds` and `response`.
+
+    `"error"`
+    :   an HTTP error was passed to `process_error_response`, `data` contains `exception`.
+
+    `"postprocess"`
+    :   `postprocess_response` finished, `data` contains `seconds`.
+
+    `"process_page"`
+    :   the page's `process_page` was exhausted, `data` contains `seconds` and
+        the number of `items` and subpages (`pages`) it yielded.
+
+    `"item"`
+    :   the page yielded (or returned) an item, as opposed to a subpage.
+
+    `"process_item"`
+    :   a `ListPage.process_item` call finished, `data` contains `seconds`.
+
+    `"selector"`
+    :   a `Selector` matched, `data` contains `seconds` and `selector`.
+
+    `"skip"`
+    :   `SkipItem` was raised.
+
+    `"queue"`
+    :   a page was taken from the pages pending in a breadth-first or priority
+        scrape, `data` contains `size`, the number of pages still pending.  Not
+        emitted by depth-first scrapes, which scrape each subpage as it's yielded.
+
+    `"throttle"`
+    :   `spatula.scraper.Scraper` waited to respect its rate limit, `data` contains
+        `seconds` and `host`.  (`page` may be `None`)
+
+    `"rate"`
+    :   an `AdaptiveThrottle` adjusted its limits after a response, `data` contains
+        `host`, `requests_per_minute`, and `concurrency`.  (`page` may be `None`)
+
+    :param hook: Callable to invoke for each event.
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    """
+    Remove a hook previously registered with `add_hook`.
+
+    :param hook: Callable to remove.
+    """
+    _hooks.remove(hook)
+
+
+def _emit(event: str, page: typing.Optional["Page"], **data: typing.Any) -> None:
+    for hook in _hooks:
+        hook(event, page, **data)
@@ -0,0 +1,206 @@
+import collections
+import threading
+import time
+import typing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .hooks import add_hook, remove_hook
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .pages import Page
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsCollector:
+    """
+    Hook that maintains counters & gauges describing a running scrape, which can be
+    rendered in the Prometheus/OpenMetrics text format via `render`.
+
+    Typically used via `spatula scrape --metrics-port`, or `serve_metrics`.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.requests = 0
+        self.cache_hits = 0
+        self.responses: typing.Counter[str] = collections.Counter()
+        self.items = 0
+        self.queue_depth = 0
+        self.throttle_waits: typing.Counter[str] = collections.Counter()
+        self.throttle_seconds: typing.Counter[str] = collections.Counter()
+        # current limits for each host, when using an AdaptiveThrottle
+        self.host_rates: typing.Dict[str, float] = {}
+        self.host_concurrency: typing.Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "MetricsCollector":
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc: typing.Any) -> None:
+        remove_hook(self)
+
+    def __call__(
+        self, event: str, page: typing.Optional["Page"], **data: typing.Any
+    ) -> None:
+        with self._lock:
+            if event == "fetch":
+                response = data["response"]
+                if getattr(response, "fromcache", False):
+                    self.cache_hits += 1
+                    return
+                status = getattr(response, "status_code", None)
+                if status is not None:
+                    self.requests += 1
+                    self.responses[str(status)] += 1
+            elif event == "item":
+                # counted as each item is produced, not once its page is finished
+                self.items += 1
+            elif event == "queue":
+                self.queue_depth = data["size"]
+            elif event == "throttle":
+                self.throttle_waits[data["host"]] += 1
+                self.throttle_seconds[data["host"]] += data["seconds"]
+            elif event == "rate":
+                self.host_rates[data["host"]] = data["requests_per_minute"]
+                self.host_concurrency[data["host"]] = data["concurrency"]
+
+    def render(self) -> str:
+        """
+        Return current metrics in the Prometheus text exposition format.
+        """
+        lines = []
+
+        def metric(
+            name: str,
+            kind: str,
+            help: str,
+            values: typing.Iterable[typing.Tuple[str, float]],
+        ) -> None:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in values:
+                lines.append(f"{name}{labels} {value}")
+
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            errors = {s: n for s, n in self.responses.items() if int(s) >= 400}
+            metric(
+                "spatula_requests_total",
+                "counter",
+                "HTTP requests made, excluding cache hits.",
+                [("", self.requests)],
+            )
+            metric(
+                "spatula_cache_hits_total",
+                "counter",
+                "Responses served from cache.",
+                [("", self.cache_hits)],
+            )
+            metric(
+                "spatula_responses_total",
+                "counter",
+                "HTTP responses by status code.",
+                [(_labels(status=s), n) for s, n in sorted(self.responses.items())],
+            )
+            metric(
+                "spatula_errors_total",
+                "counter",
+                "HTTP error responses (status >= 400) by status code.",
+                [(_labels(status=s), n) for s, n in sorted(errors.items())],
+            )
+            metric(
+                "spatula_items_total",
+                "counter",
+                "Items produced by the scrape.",
+                [("", self.items)],
+            )
+            metric(
+                "spatula_items_per_second",
+                "gauge",
+                "Average items produced per second since the scrape began.",
+                [("", self.items / elapsed if elapsed else 0)],
+            )
+            metric(
+                "spatula_queue_depth",
+                "gauge",
+                "Pages waiting to be scraped, in breadth-first & priority scrapes.",
+                [("", self.queue_depth)],
+            )
+            metric(
+                "spatula_throttle_waits_total",
+                "counter",
+                "Requests delayed by rate limiting, by host.",
+                [(_labels(host=h), n) for h, n in sorted(self.throttle_waits.items())],
+            )
+            metric(
+                "spatula_throttle_wait_seconds_total",
+                "counter",
+                "Seconds spent waiting on rate limiting, by host.",
+                [
+                    (_labels(host=h), n)
+                    for h, n in sorted(self.throttle_seconds.items())
+                ],
+            )
+            metric(
+                "spatula_host_requests_per_minute",
+                "gauge",
+                "Current request rate limit, by host (with --adaptive).",
+                [(_labels(host=h), n) for h, n in sorted(self.host_rates.items())],
+            )
+            metric(
+                "spatula_host_concurrency",
+                "gauge",
+                "Current limit on concurrent requests, by host (with --adaptive).",
+                [
+                    (_labels(host=h), n)
+                    for h, n in sorted(self.host_concurrency.items())
+                ],
+            )
+            metric(
+                "spatula_uptime_seconds",
+                "gauge",
+                "Seconds since the scrape began.",
+                [("", elapsed)],
+            )
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(
+    collector: MetricsCollector, port: int, host: str = ""
+) -> ThreadingHTTPServer:
+    """
+    Serve `collector`'s metrics at `/metrics` from a background thread.
+
+    :param collector: `MetricsCollector` to expose.
+    :param port: Port to listen on, `0` to select a free port.
+    :param host: Address to bind to, defaults to all interfaces.
+    :returns: The running server, call `shutdown()` to stop it.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = collector.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: typing.Any) -> None:
+            # don't write a line to stderr for each poll
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
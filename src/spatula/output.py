@@ -0,0 +1,375 @@
+"""
+Writing scraped items to disk.
+"""
+import datetime
+import hashlib
+import io
+import json
+import os
+import queue
+import threading
+import typing
+from pathlib import Path
+from .utils import _obj_to_dict, _content_hash
+
+DumpFunction = typing.Callable[[typing.Any, typing.IO], None]
+# name, item, key
+_Entry = typing.Tuple[str, typing.Any, typing.Optional[str]]
+
+
+def json_dump(data: typing.Any, f: typing.IO) -> None:
+    """
+    writes the same output as `json.dump`, but encodes it in a single call instead
+    of writing it in many small chunks
+    """
+    f.write(json.dumps(data))
+
+
+def orjson_dump(data: typing.Any, f: typing.IO) -> None:
+    """
+    writes data using [orjson](https://github.com/ijl/orjson), which must be
+    installed, output is compact UTF-8 instead of ASCII-escaped
+    """
+    import orjson  # type: ignore
+
+    f.write(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode())
+
+
+DUMP_FUNCTIONS: typing.Dict[str, DumpFunction] = {
+    "json": json_dump,
+    # equivalent output, so the faster function is used
+    "json.dump": json_dump,
+    "orjson": orjson_dump,
+}
+
+
+def item_key(
+    obj: typing.Any, key_field: typing.Optional[str] = None
+) -> typing.Optional[str]:
+    """
+    key identifying an item, from its `get_key()` method or the value of `key_field`
+
+    The item's type is included, so items of different types never share a key.
+    Returns None if the item has no key.
+    """
+    if hasattr(obj, "get_key"):
+        key = obj.get_key()
+    elif key_field is None:
+        return None
+    elif isinstance(obj, dict):
+        key = obj.get(key_field)
+    else:
+        key = getattr(obj, key_field, None)
+    if key is None:
+        return None
+    return f"{type(obj).__qualname__}:{key}"
+
+
+def key_filename(key: str) -> str:
+    """
+    filename for an item with the given key, the same across scrapes
+    """
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+LAYOUTS = ("flat", "hash", "type")
+MANIFEST = "manifest.jsonl"
+TOMBSTONES = "tombstones.jsonl"
+ManifestEntry = typing.Dict[str, typing.Any]
+
+
+def item_path(name: str, obj: typing.Any, layout: str = "flat") -> str:
+    """
+    path of an item's file (without extension) relative to the output directory
+
+    flat: every item in the output directory
+    hash: spread across 256 subdirectories by a hash of the filename
+    type: a subdirectory for each type of item, such as `Employee/`
+    """
+    if layout == "hash":
+        return hashlib.blake2b(name.encode(), digest_size=1).hexdigest() + "/" + name
+    elif layout == "type":
+        return type(obj).__qualname__ + "/" + name
+    return name
+
+
+def load_manifest(output_path: Path) -> typing.Dict[str, ManifestEntry]:
+    """
+    read the manifest written to an output directory, keyed by path
+    """
+    with open(output_path / MANIFEST, encoding="utf-8") as f:
+        entries = (json.loads(line) for line in f)
+        return {entry["path"]: entry for entry in entries}
+
+
+def _digest(key: str) -> int:
+    # 64-bit digests keep the set of seen keys small, collisions are negligible
+    # until there are billions of items
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class ItemWriter:
+    """
+    Encodes & writes items to `<output_path>/<name>.json` on a background thread,
+    so that a scrape is never waiting on JSON encoding or disk I/O.  Items that
+    aren't dicts are converted on the writer thread, so callers that may modify
+    items after writing them should convert (and copy) them first.  A name may
+    include subdirectories (see `item_path`), which are created as needed.
+
+    At most `max_queued` items wait to be written, once the queue is full `write`
+    blocks until the writer catches up, so a slow disk can't exhaust memory.
+
+    If `fsync` is set, written files are flushed to disk with `os.fsync` in
+    batches of that many items (and when the writer is closed), so that items
+    reported as written survive a crash.
+
+    If `dedupe` is set, only the first item with each key is written.  An item's
+    key is passed to `write` (see `item_key`), items without one are compared by
+    their content.
+
+    If `skip_unchanged` is set, a file that already exists with exactly the same
+    content as the item is left untouched.
+
+    If `manifest` is set, `manifest.jsonl` in the output directory lists the path,
+    key (if any), and content hash of every item in the output, written or
+    unchanged, so that the output can be read without listing its directories.
+    The new manifest only replaces an existing one once the writer is closed.
+
+    If `previous` is given (the manifest of an earlier scrape into the same
+    directory, see `load_manifest`), items with the same hash as before are not
+    rewritten, and once the writer is closed after a complete scrape the files of
+    items that were not scraped again are removed and listed in `tombstones.jsonl`.
+    `previous` implies `manifest`.
+
+    Items are written in the order they're received, if writing an item fails
+    the error is raised from the next call to `write` or `close`.
+
+    Can be used as a context manager, waiting for all items to be written on exit.
+    """
+
+    def __init__(
+        self,
+        output_path: Path,
+        dump_func: DumpFunction = json_dump,
+        *,
+        max_queued: int = 1000,
+        fsync: int = 0,
+        dedupe: bool = False,
+        skip_unchanged: bool = False,
+        manifest: bool = False,
+        previous: typing.Optional[typing.Dict[str, ManifestEntry]] = None,
+    ):
+        self.output_path = output_path
+        self.dump_func = dump_func
+        self.fsync = fsync
+        self.dedupe = dedupe
+        self.skip_unchanged = skip_unchanged
+        self.previous = previous
+        self.count = 0
+        self.duplicates = 0
+        self.unchanged = 0
+        self.removed = 0
+        self._complete = True
+        self._queue: "queue.Queue[typing.Optional[_Entry]]" = queue.Queue(max_queued)
+        self._seen: typing.Set[int] = set()
+        self._current: typing.Set[str] = set()
+        self._dirs: typing.Set[Path] = {output_path}
+        # paths rather than open files, so a large batch can't exhaust descriptors
+        self._unsynced: typing.List[Path] = []
+        self._manifest: typing.Optional[typing.IO] = None
+        if manifest or previous is not None:
+            # the previous manifest is kept until this one is complete
+            self._manifest = open(
+                output_path / (MANIFEST + ".tmp"), "w", encoding="utf-8"
+            )
+        self._error: typing.Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._run, name="spatula-writer", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "ItemWriter":
+        return self
+
+    def __exit__(self, exc_type: typing.Any, *exc: typing.Any) -> None:
+        self.close(complete=exc_type is None)
+
+    def write(
+        self, name: str, item: typing.Any, key: typing.Optional[str] = None
+    ) -> None:
+        """
+        queue item (a dict, dataclass, attrs, or pydantic object) to be written
+        """
+        self._raise_error()
+        self._queue.put((name, item, key))
+
+    def close(self, complete: bool = True) -> None:
+        """
+        wait for all queued items to be written
+
+        `complete` should be False if the scrape didn't finish, so that items
+        which weren't reached aren't treated as removed
+        """
+        if self._thread.is_alive():
+            self._complete = complete
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self) -> None:
+        failed = False
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            # after a failure, items are discarded until the error is raised
+            if failed:
+                continue
+            try:
+                self._write(*entry)
+            except Exception as e:
+                self._error = e
+                failed = True
+        try:
+            if self.previous is not None:
+                self._finish_update(self._complete and not failed)
+            self._sync()
+            if self._manifest:
+                self._manifest.close()
+                os.replace(self._manifest.name, self.output_path / MANIFEST)
+                if self.fsync:
+                    _fsync_dir(self.output_path)
+        except Exception as e:
+            self._error = self._error or e
+        finally:
+            if self._manifest:
+                self._manifest.close()
+
+    def _write(self, name: str, item: typing.Any, key: typing.Optional[str]) -> None:
+        data = _obj_to_dict(item)
+        if self.dedupe:
+            digest = _digest(key if key is not None else _content_hash(data))
+            if digest in self._seen:
+                self.duplicates += 1
+                return
+            self._seen.add(digest)
+
+        path = self.output_path / (name + ".json")
+        encoded = content_hash = None
+        if self.skip_unchanged or self._manifest:
+            buf = io.StringIO()
+            self.dump_func(data, buf)
+            encoded = buf.getvalue()
+            content = encoded.encode()
+            content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+            if self._is_unchanged(name, path, content, content_hash):
+                self.unchanged += 1
+                self._add_to_manifest(name, key, content_hash)
+                return
+
+        if path.parent not in self._dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._dirs.add(path.parent)
+        with open(path, "w", encoding="utf-8") as f:
+            if encoded is None:
+                self.dump_func(data, f)
+            else:
+                f.write(encoded)
+        if self.fsync:
+            self._unsynced.append(path)
+        self.count += 1
+        self._add_to_manifest(name, key, content_hash)
+        if self.fsync and len(self._unsynced) >= self.fsync:
+            self._sync()
+
+    def _is_unchanged(
+        self, name: str, path: Path, content: bytes, content_hash: str
+    ) -> bool:
+        if self.previous is not None:
+            previous = self.previous.get(name + ".json")
+            # the stored hash avoids reading the existing file
+            if previous is not None and previous.get("hash") == content_hash:
+                return path.exists()
+            return False
+        return self.skip_unchanged and _has_content(path, content)
+
+    def _add_to_manifest(
+        self, name: str, key: typing.Optional[str], content_hash: typing.Optional[str]
+    ) -> None:
+        if self._manifest:
+            entry = {"path": name + ".json", "key": key, "hash": content_hash}
+            self._manifest.write(json.dumps(entry) + "\n")
+            if self.previous is not None:
+                self._current.add(name + ".json")
+
+    def _finish_update(self, complete: bool) -> None:
+        assert self.previous is not None and self._manifest is not None
+        missing = [
+            entry for path, entry in self.previous.items() if path not in self._current
+        ]
+        if not missing:
+            return
+        if not complete:
+            # the files of items that weren't reached are still in the output
+            for entry in missing:
+                self._manifest.write(json.dumps(entry) + "\n")
+            return
+        removed = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        with open(self.output_path / TOMBSTONES, "a", encoding="utf-8") as tombstones:
+            for entry in missing:
+                try:
+                    os.remove(self.output_path / entry["path"])
+                except FileNotFoundError:
+                    pass
+                tombstone = {
+                    "path": entry["path"],
+                    "key": entry.get("key"),
+                    "removed": removed,
+                }
+                tombstones.write(json.dumps(tombstone) + "\n")
+                self.removed += 1
+
+    def _sync(self) -> None:
+        if not self._unsynced:
+            return
+        paths, self._unsynced = self._unsynced, []
+        # files are reopened one at a time, their written data is still in the
+        # OS's page cache to be flushed
+        for path in paths:
+            fd = os.open(path, os.O_RDWR)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        if self._manifest:
+            self._manifest.flush()
+            os.fsync(self._manifest.fileno())
+        for path in {path.parent for path in paths}:
+            _fsync_dir(path)
+
+
+def _fsync_dir(path: Path) -> None:
+    # new directory entries must be synced too, not possible on Windows
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _has_content(path: Path, content: bytes) -> bool:
+    try:
+        # comparing sizes first avoids reading most changed files
+        if path.stat().st_size != len(content):
+            return False
+        return path.read_bytes() == content
+    except FileNotFoundError:
+        return False
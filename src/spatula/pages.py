@@ -1,20 +1,28 @@
+import collections
+import functools
 import io
-import csv
+import json
 import time
-import tempfile
-import subprocess
+import heapq
+import queue
+import itertools
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 import warnings
 import typing
-import requests
-import scrapelib
-import lxml.html  # type: ignore
 from abc import ABC, abstractmethod
-from openpyxl import load_workbook  # type: ignore
 from . import config
-from .sources import Source, URL
+from .hooks import _emit, _current_page
+from .sources import Source, URL, ArchiveMember, BatchSource, _Batch, _spool_file
 from .utils import _obj_to_dict
 
+# parsing & HTTP libraries are imported where they are used, so that importing
+# spatula (and running the CLI) only pays for the ones a scrape actually needs
+if typing.TYPE_CHECKING:  # pragma: no cover
+    import requests
+    import scrapelib
+
 
 def _to_scout_result(result: typing.Any) -> typing.Dict[str, typing.Any]:
     _next: typing.Optional[str]
@@ -30,6 +38,198 @@ def _to_scout_result(result: typing.Any) -> typing.Dict[str, typing.Any]:
     }
 
 
+ORDERS = ("dfs", "bfs", "priority")
+
+
+Follow = typing.Optional[typing.Callable[["Page"], bool]]
+
+
+def _traverse_dfs(
+    page: "Page", scraper: "scrapelib.Scraper", scout: bool, follow: Follow
+) -> typing.Iterable[typing.Any]:
+    # an explicit stack of per-page generators replaces recursion, so each item is
+    # yielded directly regardless of how deep the pagination/subpage chain is
+    # the bottom of the stack is always the initial page's pagination chain
+    stack = [page._process(scraper, scout)]
+    while stack:
+        try:
+            item = next(stack[-1])
+        except StopIteration as stop:
+            stack.pop()
+            # the next page in a pagination chain takes the place of the previous one
+            if stop.value is not None:
+                stack.append(stop.value._process(scraper, scout and not stack))
+            continue
+        # no "queue" events, nothing waits: each subpage is scraped as it's yielded
+        if isinstance(item, Page):
+            if follow is None or len(stack) > 1 or follow(item):
+                stack.append(item._process(scraper, False))
+        else:
+            yield item
+
+
+def _bfs_key(page: "Page", depth: int) -> typing.Tuple[int, ...]:
+    return (depth,)
+
+
+def _priority_key(page: "Page", depth: int) -> typing.Tuple[int, ...]:
+    # highest priority first, deepest first among equals so pending work drains
+    return (-page.get_priority(), -depth)
+
+
+# a page waiting in a frontier, see _pack
+_WorkUnit = typing.Union[
+    "Page", typing.Tuple[typing.Type["Page"], typing.Any, typing.Any]
+]
+
+
+def _pack(page: "Page") -> _WorkUnit:
+    # most pending pages hold nothing but their input & source, keep those in a
+    # tuple instead of a whole instance, and a plain GET URL as just its string
+    attrs = page.__dict__
+    if "input" not in attrs or not attrs.keys() <= {"input", "source"}:
+        return page
+    # _unpack can only rebuild pages that Page.__init__ alone would have set up
+    if type(page).__init__ is not Page.__init__:
+        return page
+    source = attrs.get("source")
+    if (
+        type(source) is URL
+        and source.method == "GET"
+        and source.data is None
+        and source.headers is None
+        and source.verify
+        and source.timeout is None
+        and source.retries is None
+        and not source.stream
+    ):
+        source = source.url
+    return (page.__class__, attrs["input"], source)
+
+
+def _unpack(work: _WorkUnit) -> "Page":
+    if not isinstance(work, tuple):
+        return work
+    cls, input_val, source = work
+    page = cls.__new__(cls)
+    page.input = input_val
+    if source is not None:
+        page.source = source
+    return page
+
+
+def _traverse_frontier(
+    page: "Page",
+    scraper: "scrapelib.Scraper",
+    scout: bool,
+    follow: Follow,
+    key: typing.Callable[["Page", int], typing.Tuple[int, ...]],
+) -> typing.Iterable[typing.Any]:
+    # frontier is ordered by key, a counter breaks ties in FIFO order
+    # depth 0 is the initial page's pagination chain
+    counter = itertools.count()
+    frontier: typing.List[typing.Tuple[typing.Any, int, int, _WorkUnit]] = [
+        (key(page, 0), next(counter), 0, page)
+    ]
+
+    def push(page: "Page", depth: int) -> None:
+        heapq.heappush(frontier, (key(page, depth), next(counter), depth, _pack(page)))
+
+    while frontier:
+        _, _, depth, work = heapq.heappop(frontier)
+        page = _unpack(work)
+        _emit("queue", page, size=len(frontier))
+        results = page._process(scraper, scout and depth == 0)
+        while True:
+            try:
+                item = next(results)
+            except StopIteration as stop:
+                # next page in a pagination chain is at the same depth
+                if stop.value is not None:
+                    push(stop.value, depth)
+                break
+            if isinstance(item, Page):
+                if follow is None or depth > 0 or follow(item):
+                    push(item, depth + 1)
+            else:
+                yield item
+
+
+def _batched(pages: typing.List["Page"]) -> typing.List["Page"]:
+    # the first of these pages to be fetched makes the request for all of them
+    _Batch([page.source for page in pages])  # type: ignore
+    return pages
+
+
+class _Failed:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_DONE = object()
+
+
+def _iter_pages(
+    pages: typing.Sequence["Page"],
+    scraper: "scrapelib.Scraper",
+    *,
+    workers: int = 1,
+    **kwargs: typing.Any,
+) -> typing.Iterable[typing.Any]:
+    """
+    yield results from several pages, each traversed in its own thread if workers > 1
+
+    all traversals share the same scraper (and therefore its rate limit) and their
+    results are yielded from the calling thread, so output needs no synchronization
+    """
+    if workers <= 1 or len(pages) <= 1:
+        for page in pages:
+            yield from page._to_items(scraper, **kwargs)
+        return
+
+    # bounded, so that a slow consumer applies backpressure to the workers
+    results: queue.Queue = queue.Queue(maxsize=workers * 100)
+    stop = threading.Event()
+
+    def put(item: typing.Any) -> bool:
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(page: "Page") -> None:
+        try:
+            for item in page._to_items(scraper, **kwargs):
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failed(e))
+        else:
+            put(_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="spatula")
+    for page in pages:
+        executor.submit(run, page)
+    try:
+        remaining = len(pages)
+        while remaining:
+            item = results.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, _Failed):
+                raise item.exc
+            else:
+                yield item
+    finally:
+        # also reached if the consumer stops early, pending & running traversals
+        # see stop and exit before producing anything else
+        stop.set()
+        executor.shutdown(wait=True)
+
+
 class SkipItem(Exception):
     """
     To be raised to skip processing of the current item & continue with the next item.
@@ -68,7 +268,7 @@ class HandledError(Exception):
 
 
 class RejectedResponse(Exception):
-    def __init__(self, retries: int, response: requests.Response):
+    def __init__(self, retries: int, response: "requests.Response"):
         self.response = response
         super().__init__(
             f"Response was rejected ({retries}x) by accept_response: {response}"
@@ -125,18 +325,54 @@ class Page(ABC):
         See [Specifying Dependencies](advanced-techniques.md#specifying-dependencies) for
         a more detailed explanation.
 
+    `priority`
+    :   Integer priority used when scraping with `order="priority"`, pages with a
+        higher priority are scraped before those with a lower one. (`0` by default)
+
+        To compute a priority from `self.input`, override `get_priority` instead.
+
+    `release_response`
+    :   If `True`, `self.response` and any parsed form of it (such as `self.root`) are
+        deleted once `process_page` and `get_next_source` have completed, so that
+        pages kept alive elsewhere don't hold entire documents in memory.
+        (`None` by default, which uses `spatula.config.RELEASE_RESPONSES`)
+
+    `response_attributes`
+    :   Names of the attributes removed by `release_response`, custom page types that
+        store their own parsed form of the response should add to this.
+
+    `batch_size`
+    :   If set, subpages yielded by this page that use a `BatchSource` are fetched
+        in batches of up to this many, with a single request per batch.  These
+        subpages are only scraped once their batch is full (or this page has been
+        processed), so may be scraped after subpages & items yielded later.
+        See [Batched Requests](advanced-techniques.md#batched-requests).
+
+    `encoding`
+    :   Character encoding of this page's responses, such as `"utf-8"`.  If set, it
+        is used in place of any encoding the response declares and character set
+        detection is skipped, which can be slow for large responses.
+
     **Methods**
     """
 
     source: typing.Union[None, str, Source] = None
     dependencies: typing.Dict[str, "Page"] = {}
+    priority: int = 0
+    release_response: typing.Optional[bool] = None
+    response_attributes: typing.Tuple[str, ...] = ("response",)
+    encoding: typing.Optional[str] = None
+    batch_size: typing.Optional[int] = None
+    logger: logging.Logger
     _cached_dependencies: typing.Dict[str, typing.Any] = {}
 
-    def _fetch_data(self, scraper: scrapelib.Scraper) -> None:
+    def _fetch_data(self, scraper: "scrapelib.Scraper") -> None:
         """
         ensure that the page has all of its data, this is guaranteed to be called
         exactly once before process_page is invoked
         """
+        from scrapelib import HTTPError
+
         # process dependencies first
         for key, dep in self.dependencies.items():
             use_cache = False
@@ -170,10 +406,19 @@ class Page(ABC):
         ) + 1  # type: ignore
         while attempts_remaining:
             attempts_remaining -= 1
+            start = time.perf_counter()
             try:
                 response = self.source.get_response(scraper)  # type: ignore
+                _emit(
+                    "fetch",
+                    self,
+                    seconds=time.perf_counter() - start,
+                    response=response,
+                )
                 if getattr(response, "fromcache", None):
                     self.logger.debug(f"retrieved {self.source} from cache")
+                if self.encoding and response is not None:
+                    response.encoding = self.encoding
                 if self.accept_response(response):
                     self.response = response
                 elif attempts_remaining:
@@ -187,61 +432,139 @@ class Page(ABC):
                         f"response rejected, 0/{total_attempts} attempts remaining"
                     )
                     raise RejectedResponse(total_attempts, response)
-            except scrapelib.HTTPError as e:
+            except HTTPError as e:
+                _emit(
+                    "fetch",
+                    self,
+                    seconds=time.perf_counter() - start,
+                    response=e.response,
+                )
+                _emit("error", self, exception=e)
                 self.process_error_response(e)
                 raise HandledError(e)
             else:
-                self.postprocess_response()
+                start = time.perf_counter()
+                token = _current_page.set(self)
+                try:
+                    self.postprocess_response()
+                finally:
+                    _current_page.reset(token)
+                _emit("postprocess", self, seconds=time.perf_counter() - start)
                 break
 
-    def _paginate(
-        self, scraper: scrapelib.Scraper, scout: bool
-    ) -> typing.Iterable[typing.Any]:
+    def _next_page(self) -> typing.Optional["Page"]:
         next_source = self.get_next_source()
         if next_source:
             # instantiate the same class with same input, but increment the source
-            next_page = type(self)(self.input, source=next_source)
-            yield from next_page._to_items(scraper, scout=scout)
+            return type(self)(self.input, source=next_source)
+        return None
 
-    def _to_items(
-        self, scraper: scrapelib.Scraper, *, scout: bool = False
-    ) -> typing.Iterable[typing.Any]:
+    def _release_response(self) -> None:
+        release = self.release_response
+        if release is None:
+            release = config.RELEASE_RESPONSES
+        if release:
+            for attr in self.response_attributes:
+                self.__dict__.pop(attr, None)
+
+    def _process(
+        self, scraper: "scrapelib.Scraper", scout: bool
+    ) -> typing.Generator[typing.Any, None, typing.Optional["Page"]]:
+        """
+        fetch & process this page alone, yielding its direct results (which may
+        include subpages that have not yet been processed)
+
+        the generator's return value is the next page in the pagination chain, if any
+        """
         # fetch data for a page, and then call the process_page entrypoint
         try:
             self._fetch_data(scraper)
         except HandledError:
             # ok to proceed, but nothing left to do with this page
-            yield from self._paginate(scraper, scout)
-            return
+            return self._next_page()
+        start = time.perf_counter()
+        token = _current_page.set(self)
         try:
             result = self.process_page()
         except SkipItem as e:
             # a detail page can raise SkipItem, which means no further processing of
             # that detail page (as there is no result)
             self.logger.info(f"SkipItem: {e}")
-            return
+            _emit("skip", self)
+            self._release_response()
+            return None
+        finally:
+            _current_page.reset(token)
+        seconds = time.perf_counter() - start
+        num_items = num_pages = 0
+        # subpages waiting to be fetched in a batch, by type of source
+        batches: typing.Dict[type, typing.List[Page]] = {}
+        batch_size = 0 if scout else self.batch_size or 0
 
         # if we got back a generator, we need to process each result
         if isinstance(result, typing.Generator):
             # each item yielded might be a Page or an end-result
-            for item in result:
-                if scout:
-                    yield _to_scout_result(item)
-                elif isinstance(item, Page):
-                    yield from item._to_items(scraper)
+            while True:
+                start = time.perf_counter()
+                token = _current_page.set(self)
+                try:
+                    item = next(result)
+                except StopIteration:
+                    break
+                finally:
+                    _current_page.reset(token)
+                    seconds += time.perf_counter() - start
+                if isinstance(item, Page):
+                    num_pages += 1
+                    source = getattr(item, "source", None)
+                    if (
+                        batch_size
+                        and isinstance(source, BatchSource)
+                        and source.batch is None
+                    ):
+                        batch = batches.setdefault(type(source), [])
+                        batch.append(item)
+                        if len(batch) >= batch_size:
+                            yield from _batched(batches.pop(type(source)))
+                        continue
                 else:
-                    yield item
-        elif scout:
-            yield _to_scout_result(result)
-        elif isinstance(result, Page):
-            # single Page result, recurse deeper
-            yield from result._to_items(scraper)
+                    num_items += 1
+                    _emit("item", self)
+                yield _to_scout_result(item) if scout else item
+            for batch in batches.values():
+                yield from _batched(batch)
         else:
-            # end-result, just return as-is
-            yield result
+            if isinstance(result, Page):
+                num_pages += 1
+            else:
+                num_items += 1
+                _emit("item", self)
+            yield _to_scout_result(result) if scout else result
+        _emit("process_page", self, seconds=seconds, items=num_items, pages=num_pages)
 
-        # check for next page
-        yield from self._paginate(scraper, scout)
+        # check for next page, after which the response is no longer needed
+        next_page = self._next_page()
+        self._release_response()
+        return next_page
+
+    def _to_items(
+        self,
+        scraper: "scrapelib.Scraper",
+        *,
+        scout: bool = False,
+        order: str = "dfs",
+        follow: Follow = None,
+    ) -> typing.Iterable[typing.Any]:
+        # if provided, follow decides whether subpages of this page (or the pages of
+        # its pagination chain) should be scraped, deeper subpages are always scraped
+        if order == "dfs":
+            yield from _traverse_dfs(self, scraper, scout, follow)
+        elif order == "bfs":
+            yield from _traverse_frontier(self, scraper, scout, follow, _bfs_key)
+        elif order == "priority":
+            yield from _traverse_frontier(self, scraper, scout, follow, _priority_key)
+        else:
+            raise ValueError(f"invalid order {order!r}, must be one of {ORDERS}")
 
     def __init__(
         self,
@@ -253,9 +576,11 @@ class Page(ABC):
         # allow possibility to override default source, useful during dev
         if source:
             self.source = source
-        self.logger = logging.getLogger(
-            self.__class__.__module__ + "." + self.__class__.__name__
-        )
+
+    def __init_subclass__(cls, **kwargs: typing.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # one logger per class rather than a lookup & reference on every instance
+        cls.logger = logging.getLogger(cls.__module__ + "." + cls.__name__)
 
     def __str__(self) -> str:
         s = f"{self.__class__.__name__}("
@@ -267,17 +592,26 @@ class Page(ABC):
         return s
 
     def do_scrape(
-        self, scraper: typing.Optional[scrapelib.Scraper] = None
+        self,
+        scraper: typing.Optional["scrapelib.Scraper"] = None,
+        *,
+        order: str = "dfs",
     ) -> typing.Iterable[typing.Any]:
         """
         yield results from this page and any subpages
 
         :param scraper: Optional `scrapelib.Scraper` instance to use for running scrape.
+        :param order: Order in which subpages are visited, either `"dfs"` (the default,
+                      each subpage is scraped as soon as it is yielded), `"bfs"` (all
+                      pages at one level are scraped before any of their subpages),
+                      or `"priority"` (pages with the highest `get_priority()` first).
         :returns: Generator yielding results from the scrape.
         """
         if scraper is None:
+            import scrapelib
+
             scraper = scrapelib.Scraper()
-        yield from self._to_items(scraper)
+        yield from self._to_items(scraper, order=order)
 
     def get_source_from_input(self) -> typing.Union[None, str, Source]:
         """
@@ -303,7 +637,7 @@ class Page(ABC):
         """
         raise exception
 
-    def accept_response(self, response: requests.Response) -> bool:
+    def accept_response(self, response: "requests.Response") -> bool:
         return True
 
     @abstractmethod
@@ -323,6 +657,33 @@ class Page(ABC):
         """
         return None
 
+    def get_priority(self) -> int:
+        """
+        To be overridden if priority depends upon `self.input`.
+
+        Return the priority of this page when scraping with `order="priority"`,
+        defaults to `self.priority`.
+        """
+        return self.priority
+
+
+def _detect_encoding(response: typing.Any) -> str:
+    # checking for valid UTF-8 is far cheaper than detecting the character set,
+    # which is only needed for other encodings
+    try:
+        response.content.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return response.apparent_encoding or "utf-8"
+
+
+def _spooled(response: typing.Any) -> typing.Optional[typing.BinaryIO]:
+    # body of a response from URL(stream=True), see sources._spool
+    spool = getattr(response, "spool", None)
+    if spool is not None:
+        spool.seek(0)
+    return spool
+
 
 class HtmlPage(Page):
     """
@@ -338,10 +699,21 @@ class HtmlPage(Page):
         use this element as the target of a `Selector` subclass.
     """
 
+    response_attributes = ("response", "root")
+
     def postprocess_response(self) -> None:
-        self.root = lxml.html.fromstring(self.response.content)
-        if hasattr(self.source, "url"):
-            self.root.make_links_absolute(self.source.url)  # type: ignore
+        import lxml.html  # type: ignore
+
+        # otherwise lxml uses the document's <meta> tags or guesses
+        parser = lxml.html.HTMLParser(encoding=self.encoding) if self.encoding else None
+        spool = _spooled(self.response)
+        if spool:
+            self.root = lxml.html.parse(spool, parser).getroot()
+        else:
+            self.root = lxml.html.fromstring(self.response.content, parser=parser)
+        url = getattr(self.source, "url", None)
+        if url:
+            self.root.make_links_absolute(url)
 
 
 class XmlPage(Page):
@@ -355,8 +727,18 @@ class XmlPage(Page):
     object representing the root XML element on the page.
     """
 
+    response_attributes = ("response", "root")
+
     def postprocess_response(self) -> None:
-        self.root = lxml.etree.fromstring(self.response.content)
+        import lxml.etree  # type: ignore
+
+        # otherwise lxml uses the document's XML declaration
+        parser = lxml.etree.XMLParser(encoding=self.encoding) if self.encoding else None
+        spool = _spooled(self.response)
+        if spool:
+            self.root = lxml.etree.parse(spool, parser).getroot()
+        else:
+            self.root = lxml.etree.fromstring(self.response.content, parser)
 
 
 class JsonPage(Page):
@@ -369,8 +751,19 @@ class JsonPage(Page):
     :   JSON data from response.  (same as `self.response.json()`)
     """
 
+    response_attributes = ("response", "data")
+
     def postprocess_response(self) -> None:
-        self.data = self.response.json()
+        spool = _spooled(self.response)
+        if spool and self.encoding:
+            text = io.TextIOWrapper(spool, encoding=self.encoding)
+            self.data = json.load(text)
+            # leave the spool open
+            text.detach()
+        elif spool:
+            self.data = json.load(spool)
+        else:
+            self.data = self.response.json()
 
 
 class PdfPage(Page):  # pragma: no cover
@@ -389,32 +782,41 @@ class PdfPage(Page):  # pragma: no cover
     """
 
     preserve_layout = False
+    response_attributes = ("response", "text")
 
     def postprocess_response(self) -> None:
-        with tempfile.NamedTemporaryFile() as temp:
-            temp.write(self.response.content)
-            temp.flush()
-            temp.seek(0)
+        import tempfile
 
-            if self.preserve_layout:
-                command = ["pdftotext", "-layout", temp.name, "-"]
-            else:
-                command = ["pdftotext", temp.name, "-"]
+        spool = _spooled(self.response)
+        if spool:
+            self.text = self._pdftotext(spool.name)
+        else:
+            with tempfile.NamedTemporaryFile() as temp:
+                temp.write(self.response.content)
+                temp.flush()
+                self.text = self._pdftotext(temp.name)
 
-            try:
-                pipe = subprocess.Popen(
-                    command, stdout=subprocess.PIPE, close_fds=True
-                ).stdout
-            except OSError as e:
-                raise EnvironmentError(
-                    f"error running pdftotext, missing executable? [{e}]"
-                )
-            if pipe is None:
-                raise EnvironmentError("no stdout from pdftotext")
-            else:
-                data = pipe.read()
-                pipe.close()
-        self.text = data.decode("utf8")
+    def _pdftotext(self, path: str) -> str:
+        import subprocess
+
+        if self.preserve_layout:
+            command = ["pdftotext", "-layout", path, "-"]
+        else:
+            command = ["pdftotext", path, "-"]
+
+        try:
+            pipe = subprocess.Popen(
+                command, stdout=subprocess.PIPE, close_fds=True
+            ).stdout
+        except OSError as e:
+            raise EnvironmentError(
+                f"error running pdftotext, missing executable? [{e}]"
+            )
+        if pipe is None:
+            raise EnvironmentError("no stdout from pdftotext")
+        data = pipe.read()
+        pipe.close()
+        return data.decode("utf8")
 
 
 class ListPage(Page):
@@ -437,11 +839,15 @@ class ListPage(Page):
         self, iterable: typing.Iterable
     ) -> typing.Iterable[typing.Any]:
         for item in iterable:
+            start = time.perf_counter()
             try:
                 item = self.process_item(item)
             except SkipItem as e:
                 self.logger.info(f"SkipItem: {e}")
+                _emit("skip", self)
                 continue
+            finally:
+                _emit("process_item", self, seconds=time.perf_counter() - start)
             yield item
 
     def process_item(self, item: typing.Any) -> typing.Any:
@@ -465,8 +871,24 @@ class CsvListPage(ListPage):
     with `process_item`.
     """
 
+    response_attributes = ("response", "reader")
+
     def postprocess_response(self) -> None:
-        self.reader = csv.DictReader(io.StringIO(self.response.text))
+        import csv
+
+        spool = _spooled(self.response)
+        encoding = self.encoding or getattr(self.response, "encoding", None)
+        body: typing.BinaryIO
+        if spool:
+            # rows are read from disk as they are processed
+            body = spool
+        else:
+            body = io.BytesIO(self.response.content)
+            if not encoding:
+                encoding = _detect_encoding(self.response)
+        # decoded as rows are read, rather than decoding the whole body up front
+        text = io.TextIOWrapper(body, encoding=encoding or "utf-8", newline="")
+        self.reader = csv.DictReader(text)
 
     def process_page(self) -> typing.Iterable[typing.Any]:
         yield from self._process_or_skip_loop(self.reader)
@@ -477,8 +899,13 @@ class ExcelListPage(ListPage):  # pragma: no cover
     Processes each row in an Excel file as an item with `process_item`.
     """
 
+    response_attributes = ("response", "worksheet")
+
     def postprocess_response(self) -> None:
-        workbook = load_workbook(io.BytesIO(self.response.content))
+        from openpyxl import load_workbook  # type: ignore
+
+        spool = _spooled(self.response)
+        workbook = load_workbook(spool or io.BytesIO(self.response.content))
         # TODO: allow selecting this with a class property
         self.worksheet = workbook.active
 
@@ -486,6 +913,165 @@ class ExcelListPage(ListPage):  # pragma: no cover
         yield from self._process_or_skip_loop(self.worksheet.values)
 
 
+def _returning(
+    body: typing.Union[bytes, typing.IO[bytes]]
+) -> typing.Callable[[], typing.Union[bytes, typing.IO[bytes]]]:
+    return lambda: body
+
+
+class ArchiveListPage(ListPage):
+    """
+    Processes each file within a ZIP, tar (optionally compressed), or gzip response
+    as an item with `process_item`.  Files are read from the archive as they are
+    needed rather than all being extracted up front.
+
+    By default each file is scraped by `member_page`, which receives an
+    `ArchiveMember` as its `source`.  Override `process_item` to choose a page type
+    based on `item.name` or to pass input along.
+
+    If the archive was fetched with `URL(..., stream=True)`, each file is also
+    written to disk rather than being held in memory.
+
+    **Attributes**
+
+    `member_page`
+    :   `Page` subclass, such as a `CsvListPage`, used to scrape each file.
+
+    `member_pattern`
+    :   Glob pattern such as `"*.csv"` selecting which files to process, by default
+        all files are processed.
+
+    `workers`
+    :   Number of files in a ZIP archive to read & decompress in parallel, ahead of
+        when they are processed. (`1` by default)
+    """
+
+    member_page: typing.Optional[typing.Type[Page]] = None
+    member_pattern: typing.Optional[str] = None
+    workers: int = 1
+    response_attributes = ("response", "archive")
+
+    def postprocess_response(self) -> None:
+        self.archive = _spooled(self.response) or io.BytesIO(self.response.content)
+
+    def process_page(self) -> typing.Iterable[typing.Any]:
+        yield from self._process_or_skip_loop(self._members())
+
+    def process_item(self, item: ArchiveMember) -> typing.Any:
+        if self.member_page is None:
+            raise NotImplementedError(
+                f"{self.__class__.__name__} must set member_page or override process_item"
+            )
+        return self.member_page(source=item)
+
+    def _wanted(self, name: str) -> bool:
+        import fnmatch
+
+        return self.member_pattern is None or fnmatch.fnmatch(name, self.member_pattern)
+
+    def _members(self) -> typing.Iterable[ArchiveMember]:
+        import gzip
+
+        stream = _spooled(self.response) is not None
+        archive = self.archive
+        head = archive.read(512)
+        archive.seek(0)
+        if head.startswith(b"PK"):
+            yield from self._zip_members(archive, stream)
+        elif head[257:262] == b"ustar":
+            yield from self._tar_members(archive, stream)
+        elif head.startswith(b"\x1f\x8b"):
+            with gzip.GzipFile(fileobj=archive) as gz:
+                is_tar = gz.read(512)[257:262] == b"ustar"
+            archive.seek(0)
+            if is_tar:
+                yield from self._tar_members(archive, stream)
+            else:
+                yield from self._gzip_member(archive, stream)
+        else:
+            raise ValueError(f"{self.source} is not a ZIP, tar, or gzip archive")
+
+    def _zip_members(
+        self, archive: typing.IO[bytes], stream: bool
+    ) -> typing.Iterable[ArchiveMember]:
+        import zipfile
+
+        zf = zipfile.ZipFile(archive)
+        names = [
+            info.filename
+            for info in zf.infolist()
+            if not info.is_dir() and self._wanted(info.filename)
+        ]
+
+        def read(name: str) -> typing.Union[bytes, typing.IO[bytes]]:
+            if stream:
+                with zf.open(name) as f:
+                    return _spool_file(f)
+            return zf.read(name)
+
+        if self.workers <= 1:
+            # read lazily, when each member's page is fetched
+            for name in names:
+                yield ArchiveMember(
+                    name, functools.partial(read, name), str(self.source)
+                )
+            return
+
+        # decompression releases the GIL, so members can be read in parallel while
+        # earlier ones are processed, a bounded number ahead
+        with ThreadPoolExecutor(
+            self.workers, thread_name_prefix="spatula-archive"
+        ) as executor:
+            pending: typing.Deque[typing.Tuple[str, Future]] = collections.deque()
+            names_iter = iter(names)
+            for name in itertools.islice(names_iter, self.workers * 2):
+                pending.append((name, executor.submit(read, name)))
+            while pending:
+                name, future = pending.popleft()
+                for next_name in itertools.islice(names_iter, 1):
+                    pending.append((next_name, executor.submit(read, next_name)))
+                body = future.result()
+                yield ArchiveMember(name, _returning(body), str(self.source))
+
+    def _tar_members(
+        self, archive: typing.IO[bytes], stream: bool
+    ) -> typing.Iterable[ArchiveMember]:
+        import tarfile
+
+        # "r|*" reads the archive strictly in order, without seeking, so each
+        # member has to be read before moving on to the next
+        with tarfile.open(fileobj=archive, mode="r|*") as tf:
+            for info in tf:
+                if not info.isfile() or not self._wanted(info.name):
+                    continue
+                f = tf.extractfile(info)
+                if f is None:  # pragma: no cover
+                    continue
+                body = _spool_file(f) if stream else f.read()
+                yield ArchiveMember(info.name, _returning(body), str(self.source))
+
+    def _gzip_member(
+        self, archive: typing.IO[bytes], stream: bool
+    ) -> typing.Iterable[ArchiveMember]:
+        import gzip
+        import posixpath
+        from urllib.parse import urlparse
+
+        # a gzip file contains a single file, named after the archive
+        name = posixpath.basename(urlparse(str(self.source)).path)
+        if name.endswith(".gz"):
+            name = name[:-3]
+        if not self._wanted(name):
+            return
+
+        def read() -> typing.Union[bytes, typing.IO[bytes]]:
+            archive.seek(0)
+            with gzip.GzipFile(fileobj=archive) as gz:
+                return _spool_file(gz) if stream else gz.read()
+
+        yield ArchiveMember(name, read, str(self.source))
+
+
 class LxmlListPage(ListPage):
     """
     Base class for XML and HTML subclasses below, only difference is which
@@ -0,0 +1,151 @@
+import dataclasses
+import os
+import threading
+import typing
+from .hooks import add_hook, remove_hook
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .pages import Page
+
+
+@dataclasses.dataclass
+class PageStats:
+    """
+    Statistics collected by `Profiler` for a single `Page` subclass.
+    """
+
+    fetches: int = 0
+    fetch_seconds: float = 0.0
+    bytes: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    postprocess_seconds: float = 0.0
+    pages: int = 0
+    process_page_seconds: float = 0.0
+    process_item_calls: int = 0
+    process_item_seconds: float = 0.0
+    selector_calls: int = 0
+    selector_seconds: float = 0.0
+    items: int = 0
+    subpages: int = 0
+    skips: int = 0
+
+
+# (heading, PageStats field, format) for each column of Profiler.summary
+_COLUMNS = [
+    ("fetches", "fetches", "{:d}"),
+    ("fetch s", "fetch_seconds", "{:.2f}"),
+    ("MB", "bytes", "{:.2f}"),
+    ("cached", "cache_hits", "{:d}"),
+    ("errors", "errors", "{:d}"),
+    ("parse s", "postprocess_seconds", "{:.2f}"),
+    ("page s", "process_page_seconds", "{:.2f}"),
+    ("item s", "process_item_seconds", "{:.2f}"),
+    ("select s", "selector_seconds", "{:.2f}"),
+    ("items", "items", "{:d}"),
+    ("subpages", "subpages", "{:d}"),
+    ("skips", "skips", "{:d}"),
+]
+
+
+class Profiler:
+    """
+    Hook that records timing & volume statistics for each `Page` subclass in a scrape.
+
+    Example:
+    ``` python
+    with Profiler() as profiler:
+        for item in SomeListPage().do_scrape():
+            ...
+    print(profiler.summary())
+    ```
+
+    `process_page` time is inclusive of `process_item` and selector time, as those
+    are typically called from within `process_page`.
+    """
+
+    def __init__(self) -> None:
+        self.stats: typing.Dict[str, PageStats] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Profiler":
+        add_hook(self)
+        return self
+
+    def __exit__(self, *exc: typing.Any) -> None:
+        remove_hook(self)
+
+    def __call__(
+        self, event: str, page: typing.Optional["Page"], **data: typing.Any
+    ) -> None:
+        if page is None:
+            # e.g. a selector used outside of a scrape
+            return
+        name = page.__class__.__name__
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = PageStats()
+            if event == "fetch":
+                response = data["response"]
+                stats.fetches += 1
+                stats.fetch_seconds += data["seconds"]
+                spool = getattr(response, "spool", None)
+                if spool is not None:
+                    # streamed to disk, content is no longer available
+                    stats.bytes += os.fstat(spool.fileno()).st_size
+                else:
+                    content = getattr(response, "content", None)
+                    if isinstance(content, bytes):
+                        stats.bytes += len(content)
+                if getattr(response, "fromcache", False):
+                    stats.cache_hits += 1
+            elif event == "error":
+                stats.errors += 1
+            elif event == "postprocess":
+                stats.postprocess_seconds += data["seconds"]
+            elif event == "process_page":
+                stats.pages += 1
+                stats.process_page_seconds += data["seconds"]
+                stats.items += data["items"]
+                stats.subpages += data["pages"]
+            elif event == "process_item":
+                stats.process_item_calls += 1
+                stats.process_item_seconds += data["seconds"]
+            elif event == "selector":
+                stats.selector_calls += 1
+                stats.selector_seconds += data["seconds"]
+            elif event == "skip":
+                stats.skips += 1
+
+    def to_dict(self) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        """
+        Return collected statistics as a JSON-serializable dictionary keyed by class name.
+        """
+        with self._lock:
+            return {
+                name: dataclasses.asdict(stats) for name, stats in self.stats.items()
+            }
+
+    def summary(self) -> str:
+        """
+        Return collected statistics formatted as a plain-text table.
+        """
+        rows = [["page"] + [heading for heading, _, _ in _COLUMNS]]
+        for name, stats in sorted(self.to_dict().items()):
+            row = [name]
+            for _, field, fmt in _COLUMNS:
+                value = stats[field]
+                if field == "bytes":
+                    value /= 1024 * 1024
+                row.append(fmt.format(value))
+            rows.append(row)
+        widths = [max(len(row[n]) for row in rows) for n in range(len(rows[0]))]
+        return "\n".join(
+            "  ".join(
+                # left-align page names, right-align numbers
+                cell.ljust(width) if n == 0 else cell.rjust(width)
+                for n, (cell, width) in enumerate(zip(row, widths))
+            )
+            for row in rows
+        )
@@ -0,0 +1,270 @@
+import email.utils
+import threading
+import time
+import typing
+from urllib.parse import urlparse
+import requests
+import scrapelib
+from requests.adapters import BaseAdapter
+from .hooks import _emit, _current_page
+
+# responses indicating that a server is overloaded, rather than an error in a request
+OVERLOAD_STATUSES = {429, 502, 503, 504}
+
+
+def accept_encoding() -> str:
+    """
+    every content encoding responses can be decoded from: gzip & deflate, as well as
+    brotli (br) and zstd if `brotli` and `zstandard` are installed
+    """
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    return ", ".join(ACCEPT_ENCODING.split(","))
+
+
+class Scraper(scrapelib.Scraper):
+    """
+    `scrapelib.Scraper` subclass used by the spatula CLI.
+
+    Behaves identically to `scrapelib.Scraper` (apart from requesting brotli & zstd
+    compressed responses when they can be decoded), but additionally emits a `"throttle"`
+    event (with `seconds` and `host`) each time a request is delayed to respect
+    `requests_per_minute`, and is safe to share between threads: concurrent requests
+    are still limited to `requests_per_minute` in total.
+    """
+
+    def __init__(self, *args: typing.Any, **kwargs: typing.Any):
+        # per-thread since concurrent requests may be in flight for different hosts
+        self._local = threading.local()
+        self._throttle_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+        self.headers["Accept-Encoding"] = accept_encoding()
+
+    def request(  # type: ignore
+        self, method: str, url: str, *args: typing.Any, **kwargs: typing.Any
+    ) -> scrapelib.CacheResponse:
+        self._local.host = urlparse(url).netloc
+        return super().request(method, url, *args, **kwargs)
+
+    def _throttle(self) -> None:
+        start = time.perf_counter()
+        # serialized so that each thread sees the previous thread's _last_request
+        with self._throttle_lock:
+            # same calculation scrapelib uses to decide whether or not to sleep
+            delayed = self._request_frequency > time.time() - self._last_request
+            super()._throttle()
+        if delayed:
+            _emit(
+                "throttle",
+                _current_page.get(),
+                seconds=time.perf_counter() - start,
+                host=getattr(self._local, "host", ""),
+            )
+
+
+def _retry_after(response: requests.Response) -> typing.Optional[float]:
+    # either a number of seconds or an HTTP date
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, when.timestamp() - time.time())
+
+
+class _HostLimits:
+    __slots__ = (
+        "requests_per_minute",
+        "concurrency",
+        "in_flight",
+        "next_request",
+        "latency",
+        "last_decrease",
+    )
+
+    def __init__(self, requests_per_minute: float):
+        self.requests_per_minute = requests_per_minute
+        self.concurrency = 1.0
+        self.in_flight = 0
+        self.next_request = 0.0
+        self.latency: typing.Optional[float] = None
+        self.last_decrease = 0.0
+
+
+class AdaptiveThrottle:
+    """
+    Per-host request rate & concurrency limits that adapt to how each host responds.
+
+    Limits are adjusted as each response is received (additive increase,
+    multiplicative decrease):
+
+    * a successful response raises the host's rate by `increase` requests per
+      minute, and its concurrency by about one request per round of requests
+    * an overload response (429, 502, 503, 504), a connection error, or a response
+      taking more than `slow_factor` times as long as is typical for the host
+      multiplies both by `decrease`, at most once per typical response time
+    * a `Retry-After` header pauses all requests to the host for that long
+
+    :param requests_per_minute: Initial rate for each host.
+    :param min_requests_per_minute: Lowest rate a host will be reduced to.
+    :param max_requests_per_minute: Highest rate a host will be raised to.
+    :param max_concurrency: Most requests that will be made to a host at once.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 60,
+        *,
+        min_requests_per_minute: float = 1,
+        max_requests_per_minute: float = 600,
+        max_concurrency: int = 8,
+        increase: float = 1,
+        decrease: float = 0.5,
+        slow_factor: float = 4,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.min_requests_per_minute = min_requests_per_minute
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self._hosts: typing.Dict[str, _HostLimits] = {}
+        self._condition = threading.Condition()
+
+    def limits(self, host: str) -> typing.Tuple[float, int]:
+        """
+        current requests per minute & concurrency for host
+        """
+        with self._condition:
+            limits = self._limits(host)
+            return limits.requests_per_minute, int(limits.concurrency)
+
+    def _limits(self, host: str) -> _HostLimits:
+        if host not in self._hosts:
+            self._hosts[host] = _HostLimits(self.requests_per_minute)
+        return self._hosts[host]
+
+    def acquire(self, host: str) -> float:
+        """
+        wait until a request can be made to host, returning the seconds waited
+
+        every call must be followed by a call to `release`
+        """
+        start = time.monotonic()
+        with self._condition:
+            limits = self._limits(host)
+            while True:
+                now = time.monotonic()
+                if limits.in_flight < int(limits.concurrency):
+                    if now >= limits.next_request:
+                        break
+                    self._condition.wait(limits.next_request - now)
+                else:
+                    # woken when a request to any host completes
+                    self._condition.wait()
+            limits.in_flight += 1
+            limits.next_request = now + 60 / limits.requests_per_minute
+        return now - start
+
+    def release(
+        self,
+        host: str,
+        seconds: float,
+        response: typing.Optional[requests.Response] = None,
+    ) -> None:
+        """
+        record the outcome of a request made after `acquire`, `response` is None
+        if the request failed without a response
+        """
+        with self._condition:
+            limits = self._limits(host)
+            limits.in_flight -= 1
+            now = time.monotonic()
+            status = response.status_code if response is not None else None
+            slow = (
+                limits.latency is not None
+                and seconds > limits.latency * self.slow_factor
+            )
+            if status is None or status in OVERLOAD_STATUSES or slow:
+                # requests that were already in flight will report the same problem
+                if now - limits.last_decrease > (limits.latency or 0):
+                    limits.last_decrease = now
+                    limits.requests_per_minute = max(
+                        self.min_requests_per_minute,
+                        limits.requests_per_minute * self.decrease,
+                    )
+                    limits.concurrency = max(1.0, limits.concurrency * self.decrease)
+            else:
+                limits.requests_per_minute = min(
+                    self.max_requests_per_minute,
+                    limits.requests_per_minute + self.increase,
+                )
+                limits.concurrency = min(
+                    self.max_concurrency, limits.concurrency + 1 / limits.concurrency
+                )
+            if status is not None:
+                # smoothed, so that a single slow response doesn't become typical
+                if limits.latency is None:
+                    limits.latency = seconds
+                else:
+                    limits.latency = 0.8 * limits.latency + 0.2 * seconds
+            retry_after = _retry_after(response) if response is not None else None
+            if retry_after:
+                limits.next_request = max(limits.next_request, now + retry_after)
+            self._condition.notify_all()
+
+
+class ThrottlingAdapter(BaseAdapter):
+    """
+    transport adapter that limits the requests made by another adapter using an
+    `AdaptiveThrottle`, emitting `"throttle"` and `"rate"` events
+    """
+
+    def __init__(self, throttle: AdaptiveThrottle, adapter: BaseAdapter):
+        super().__init__()
+        self.throttle = throttle
+        self.adapter = adapter
+
+    def send(  # type: ignore
+        self, request: requests.PreparedRequest, **kwargs: typing.Any
+    ) -> requests.Response:
+        host = urlparse(request.url or "").netloc
+        page = _current_page.get()
+        waited = self.throttle.acquire(host)
+        if waited:
+            _emit("throttle", page, seconds=waited, host=host)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.adapter.send(request, **kwargs)
+            return response
+        finally:
+            self.throttle.release(host, time.perf_counter() - start, response)
+            rate, concurrency = self.throttle.limits(host)
+            _emit(
+                "rate",
+                page,
+                host=host,
+                requests_per_minute=rate,
+                concurrency=concurrency,
+            )
+
+    def close(self) -> None:
+        self.adapter.close()
+
+
+def throttle_requests(session: requests.Session, throttle: AdaptiveThrottle) -> None:
+    """
+    limit all HTTP(S) requests made by `session` with `throttle`, replacing any
+    fixed `requests_per_minute`
+    """
+    if isinstance(session, scrapelib.Scraper):
+        session.requests_per_minute = 0
+    for prefix in ("https://", "http://"):
+        session.mount(prefix, ThrottlingAdapter(throttle, session.get_adapter(prefix)))
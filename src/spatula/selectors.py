@@ -1,9 +1,13 @@
 import re
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, List, Iterator
-from lxml.etree import _Element  # type: ignore
+from typing import Optional, List, Iterator, TYPE_CHECKING
+from .hooks import _emit, _current_page
 from .utils import _display
 
+if TYPE_CHECKING:  # pragma: no cover
+    from lxml.etree import _Element  # type: ignore
+
 
 class SelectorError(ValueError):
     """
@@ -31,12 +35,12 @@ class Selector(ABC):
 
     def match(
         self,
-        element: _Element,
+        element: "_Element",
         *,
         min_items: Optional[int] = None,
         max_items: Optional[int] = None,
         num_items: Optional[int] = None,
-    ) -> List[_Element]:
+    ) -> List["_Element"]:
         """
         Return all matches of the given selector within `element`.
 
@@ -49,7 +53,14 @@ class Selector(ABC):
         :param max_items: A maximum number of items to match.
         :param num_items: An exact number of items to match.
         """
+        start = time.perf_counter()
         items = list(self.get_items(element))
+        _emit(
+            "selector",
+            _current_page.get(),
+            seconds=time.perf_counter() - start,
+            selector=self,
+        )
         num_items = self.num_items if num_items is None else num_items
         max_items = self.max_items if max_items is None else max_items
         min_items = self.min_items if min_items is None else min_items
@@ -72,7 +83,7 @@ class Selector(ABC):
 
         return items
 
-    def match_one(self, element: _Element) -> _Element:
+    def match_one(self, element: "_Element") -> "_Element":
         """
         Return exactly one match.
 
@@ -81,7 +92,9 @@ class Selector(ABC):
         return self.match(element, num_items=1)[0]
 
     @abstractmethod
-    def get_items(self, element: _Element) -> Iterator[_Element]:  # pragma: no cover
+    def get_items(
+        self, element: "_Element"
+    ) -> Iterator["_Element"]:  # pragma: no cover
         pass
 
 
@@ -105,7 +118,7 @@ class XPath(Selector):
         super().__init__(min_items=min_items, max_items=max_items, num_items=num_items)
         self.xpath = xpath
 
-    def get_items(self, element: _Element) -> Iterator[_Element]:
+    def get_items(self, element: "_Element") -> Iterator["_Element"]:
         yield from element.xpath(self.xpath)
 
     def __str__(self) -> str:  # pragma: no cover
@@ -132,7 +145,7 @@ class SimilarLink(Selector):
         super().__init__(min_items=min_items, max_items=max_items, num_items=num_items)
         self.pattern = re.compile(pattern)
 
-    def get_items(self, element: _Element) -> Iterator[_Element]:
+    def get_items(self, element: "_Element") -> Iterator["_Element"]:
         seen = set()
         for element in element.xpath("//a"):
             href = element.get("href")
@@ -168,7 +181,7 @@ class CSS(Selector):
         super().__init__(min_items=min_items, max_items=max_items, num_items=num_items)
         self.css_selector = css_selector
 
-    def get_items(self, element: _Element) -> Iterator[_Element]:
+    def get_items(self, element: "_Element") -> Iterator["_Element"]:
         yield from element.cssselect(self.css_selector)
 
     def __str__(self) -> str:  # pragma: no cover
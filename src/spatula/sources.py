@@ -1,13 +1,43 @@
-from typing import Optional
-import requests
-import scrapelib
+import collections
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Union,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+    import scrapelib
 
 
 class Source:
-    pass
+    # subclasses that don't define __slots__ still get a __dict__ as usual
+    __slots__ = ()
 
 
 class URL(Source):
+    # a scrape may have hundreds of thousands of these waiting to be fetched
+    __slots__ = (
+        "url",
+        "method",
+        "data",
+        "headers",
+        "verify",
+        "timeout",
+        "retries",
+        "stream",
+    )
+
     def __init__(
         self,
         url: str,
@@ -17,6 +47,7 @@ class URL(Source):
         verify: bool = True,
         timeout: Optional[float] = None,
         retries: Optional[int] = None,
+        stream: bool = False,
     ):
         """
         Defines a resource to fetch via URL, particularly useful for handling non-GET
@@ -29,6 +60,10 @@ class URL(Source):
         :param verify: bool indicating whether or not to verify SSL certificates for request, defaults to True
         :param timeout: HTTP(S) timeout in seconds
         :param retries: number of retries to make
+        :param stream: if True, the response body is written to a temporary file as it
+                       is downloaded instead of being held in memory, available as
+                       `response.spool`.  Useful for very large files, `content` and
+                       `text` cannot be used on these responses.
         """
 
         self.url = url
@@ -38,35 +73,334 @@ class URL(Source):
         self.verify = verify
         self.timeout = timeout
         self.retries = retries
+        self.stream = stream
 
     def get_response(
-        self, scraper: scrapelib.Scraper
-    ) -> Optional[requests.models.Response]:
-        return scraper.request(
+        self, scraper: "scrapelib.Scraper"
+    ) -> Optional["requests.models.Response"]:
+        response = scraper.request(
             method=self.method,
             url=self.url,
             data=self.data,
             headers=self.headers,
             verify=self.verify,
             timeout=self.timeout,
+            stream=self.stream,
         )
+        if self.stream:
+            _spool(response)
+        return response
 
     def __str__(self) -> str:
         return self.url
 
 
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def _spool_chunks(chunks: Iterable[bytes]) -> IO[bytes]:
+    import tempfile
+
+    # named, so that external tools (e.g. pdftotext) can read it by path
+    spool = tempfile.NamedTemporaryFile(prefix="spatula-")
+    try:
+        for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.flush()
+    spool.seek(0)
+    return spool
+
+
+def _spool_file(f: Any) -> IO[bytes]:
+    return _spool_chunks(iter(lambda: f.read(SPOOL_CHUNK_SIZE), b""))
+
+
+def _spool(response: "requests.models.Response") -> None:
+    # already spooled, e.g. by archive.RecordingAdapter
+    if getattr(response, "spool", None) is not None:
+        return
+    try:
+        spool = _spool_chunks(response.iter_content(SPOOL_CHUNK_SIZE))
+    finally:
+        response.close()
+    response.spool = spool  # type: ignore
+
+
+def _make_response(
+    url: str, body: Union[bytes, IO[bytes]], content_type: Optional[str] = None
+) -> "requests.models.Response":
+    """
+    build a response for data that didn't come from an HTTP request, a file object
+    is used as the response's spool as if it had been fetched with stream=True
+    """
+    import requests
+
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    if content_type:
+        response.headers["Content-Type"] = content_type
+    if isinstance(body, bytes):
+        response._content = body
+    else:
+        response._content_consumed = True  # type: ignore
+        response.spool = body  # type: ignore
+    return response
+
+
 class NullSource(Source):
     """
     Special class to set as a page's `source` to indicate no HTTP request needs
     to be performed.
     """
 
+    __slots__ = ()
     retries = 0
 
     def get_response(
-        self, scraper: scrapelib.Scraper
-    ) -> Optional[requests.models.Response]:
+        self, scraper: "scrapelib.Scraper"
+    ) -> Optional["requests.models.Response"]:
         return None
 
     def __str__(self) -> str:
         return self.__class__.__name__
+
+
+class FileSource(Source):
+    """
+    A local file, such as a previously saved response, to be processed as if it had
+    been fetched.
+    """
+
+    __slots__ = ("path", "url", "stream")
+    retries = 0
+
+    def __init__(self, path: str, url: Optional[str] = None, stream: bool = False):
+        """
+        :param path: path of the file to read
+        :param url: URL the file was originally retrieved from, if known.  Used to
+                    resolve relative links.
+        :param stream: if True, the file is passed to the page as `response.spool`
+                       and parsed directly from disk instead of being read into
+                       memory first, as with `URL(..., stream=True)`
+        """
+        self.path = path
+        self.url = url
+        self.stream = stream
+
+    def get_response(
+        self, scraper: "scrapelib.Scraper"
+    ) -> Optional["requests.models.Response"]:
+        import mimetypes
+
+        content_type, _ = mimetypes.guess_type(self.path)
+        body: Union[bytes, IO[bytes]]
+        if self.stream:
+            body = open(self.path, "rb")
+        else:
+            with open(self.path, "rb") as f:
+                body = f.read()
+        return _make_response(self.url or self.path, body, content_type)
+
+    def __str__(self) -> str:
+        return self.path
+
+
+class DirectorySource(NullSource):
+    """
+    A directory of local files, iterating over it yields a `FileSource` for each
+    file matching `pattern`.
+
+    Pages using a `DirectorySource` make no request, as with `NullSource`, and would
+    typically yield a subpage for each file.
+    """
+
+    __slots__ = ("path", "pattern", "stream")
+
+    def __init__(self, path: str, pattern: str = "*", stream: bool = False):
+        """
+        :param path: directory to read files from
+        :param pattern: glob pattern selecting files within the directory, use
+                        `**/` to include subdirectories (e.g. `"**/*.html"`)
+        :param stream: passed to each `FileSource`
+        """
+        self.path = path
+        self.pattern = pattern
+        self.stream = stream
+
+    def __iter__(self) -> Iterator[FileSource]:
+        from pathlib import Path
+
+        for path in sorted(Path(self.path).glob(self.pattern)):
+            if path.is_file():
+                yield FileSource(str(path), stream=self.stream)
+
+    def __str__(self) -> str:
+        return f"{self.path}/{self.pattern}"
+
+
+class ArchiveMember(Source):
+    """
+    A single file within an archive, yielded by `ArchiveListPage` to be used as the
+    `source` of the page that will process it.
+
+    `name` is the file's path within the archive.
+    """
+
+    __slots__ = ("name", "read", "archive")
+    retries = 0
+
+    def __init__(
+        self, name: str, read: Callable[[], Union[bytes, IO[bytes]]], archive: str = ""
+    ):
+        """
+        :param name: path of the file within the archive
+        :param read: function returning the file's contents, either as bytes or as
+                     a spooled file
+        :param archive: description of the archive, typically its URL
+        """
+        self.name = name
+        self.read = read
+        self.archive = archive
+
+    def get_response(
+        self, scraper: "scrapelib.Scraper"
+    ) -> Optional["requests.models.Response"]:
+        import mimetypes
+
+        content_type, _ = mimetypes.guess_type(self.name)
+        return _make_response(str(self), self.read(), content_type)
+
+    def __str__(self) -> str:
+        return f"{self.archive}#{self.name}"
+
+
+class BatchSource(Source):
+    """
+    A lookup of a single key (such as an ID) from an API that can look up many keys
+    in one request, such as a search endpoint accepting a list of IDs.
+
+    Subpages using a `BatchSource` that are yielded by a page with `batch_size` set
+    are grouped, and a single request is made for each group of up to `batch_size`
+    keys.  Each page receives its own part of that response, as if it had been
+    fetched alone.  Only sources of the same class are grouped together.
+
+    A `BatchSource` that isn't part of a group (e.g. in `spatula test`) makes a
+    request for its key alone.
+
+    Subclasses must implement `get_batch_source` and `split_response`.
+    """
+
+    __slots__ = ("key", "batch")
+    retries: Optional[int] = None
+
+    def __init__(self, key: Any):
+        """
+        :param key: value identifying this source's part of a batched request,
+                    must be hashable
+        """
+        self.key = key
+        self.batch: Optional["_Batch"] = None
+
+    def get_batch_source(self, keys: List[Any]) -> Source:
+        """
+        To be overridden.
+
+        Return the source (typically a `URL` with `method="POST"`) that fetches all
+        of `keys` at once.
+        """
+        raise NotImplementedError()
+
+    def split_response(
+        self, response: "requests.models.Response", keys: List[Any]
+    ) -> Mapping[Any, Union[bytes, "requests.models.Response"]]:
+        """
+        To be overridden.
+
+        Split the response to `get_batch_source(keys)` into a mapping of each key to
+        the body (or a complete response) to be used for that key's page.  Keys that
+        are missing from the mapping are treated as a 404 response.
+        """
+        raise NotImplementedError()
+
+    def get_response(
+        self, scraper: "scrapelib.Scraper"
+    ) -> Optional["requests.models.Response"]:
+        batch = self.batch or _Batch([self])
+        return batch.get_response(self, scraper)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({self.key!r})"
+
+
+class _Batch:
+    """
+    group of `BatchSource`s whose responses are fetched together, by whichever of
+    them is fetched first
+    """
+
+    def __init__(self, sources: List[BatchSource]):
+        self.sources = sources
+        for source in sources:
+            source.batch = self
+        self._lock = threading.Lock()
+        self._content_type: Optional[str] = None
+        self._encoding: Optional[str] = None
+        self._parts: Optional[Dict[Any, Any]] = None
+        self._error: Optional[Exception] = None
+        # number of sources yet to take each key's part, and those that have
+        self._consumers = collections.Counter(source.key for source in sources)
+        self._consumed: Set[int] = set()
+
+    def get_response(
+        self, source: BatchSource, scraper: "scrapelib.Scraper"
+    ) -> "requests.models.Response":
+        from scrapelib import HTTPError
+
+        # pages of a batch may be fetched from different threads
+        with self._lock:
+            retry = id(source) in self._consumed
+            if not retry:
+                self._consumed.add(id(source))
+                if self._parts is None and self._error is None:
+                    self._fetch(source, scraper)
+                if self._error is not None:
+                    raise self._error
+                assert self._parts is not None
+                part = self._parts.get(source.key)
+                # parts are released once every page with the key has its own
+                self._consumers[source.key] -= 1
+                if self._consumers[source.key] <= 0:
+                    self._parts.pop(source.key, None)
+
+        if retry:
+            # e.g. a rejected response, which is fetched again for this key alone
+            return _Batch([source]).get_response(source, scraper)
+        if part is None:
+            response = _make_response(str(source), b"")
+            response.status_code = 404
+            raise HTTPError(response)
+        if not isinstance(part, bytes):
+            return part
+        response = _make_response(str(source), part, self._content_type)
+        response.encoding = self._encoding
+        return response
+
+    def _fetch(self, source: BatchSource, scraper: "scrapelib.Scraper") -> None:
+        # each key is requested once, however many pages share it
+        keys = list(dict.fromkeys(s.key for s in self.sources))
+        try:
+            response = source.get_batch_source(keys).get_response(scraper)  # type: ignore
+            if response is None:
+                raise ValueError(f"no response to batch request for {keys}")
+            self._parts = dict(source.split_response(response, keys))
+        except Exception as e:
+            # every page of the batch fails the same way
+            self._error = e
+        else:
+            # the batch response itself isn't kept, only what its parts need
+            self._content_type = response.headers.get("Content-Type")
+            self._encoding = response.encoding
@@ -0,0 +1,193 @@
+"""
+Transport adapters used to make the HTTP requests of a `Scraper`.
+
+The default transport is requests' own HTTP/1.1 adapter, `configure_transport` can
+enlarge its connection pool or replace it with `HTTP2Adapter`, which requires
+[httpx](https://www.python-httpx.org/) (`pip install spatula[http2]`).
+"""
+import http.client
+import types
+import typing
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    import httpx  # type: ignore
+
+
+class _HTTPXBody:
+    """
+    file-like wrapper of a streamed httpx response, in place of urllib3's response
+    as `requests.Response.raw`
+    """
+
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+        self._chunks: typing.Optional[typing.Iterator[bytes]] = None
+        self._buffer = b""
+        # lets requests read Set-Cookie headers into its cookie jar
+        msg = http.client.HTTPMessage()
+        for name, value in response.headers.multi_items():
+            msg[name] = value
+        self._original_response = types.SimpleNamespace(msg=msg)
+
+    def stream(
+        self, chunk_size: typing.Optional[int] = None, decode_content: bool = True
+    ) -> typing.Iterator[bytes]:
+        # bodies are always decoded by httpx
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        finally:
+            self.close()
+
+    def read(self, amt: typing.Optional[int] = None) -> bytes:
+        if self._chunks is None:
+            self._chunks = self._response.iter_bytes()
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.close()
+                break
+            self._buffer += chunk
+        if amt is None:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    transport adapter that makes requests with httpx, using HTTP/2 where the server
+    supports it so that many requests to a host share a few connections
+
+    Requests that use a proxy or client certificate are made by `fallback`.
+
+    :param pool_size: Most connections kept open at once, in total across all hosts
+        (each carries many concurrent requests to its host).
+    :param fallback: Adapter used for requests httpx isn't used for.
+    """
+
+    def __init__(
+        self, pool_size: int = 10, fallback: typing.Optional[BaseAdapter] = None
+    ):
+        super().__init__()
+        try:
+            import httpx
+            import h2  # type: ignore # noqa: F401
+
+            # earlier versions can't decode every encoding in Accept-Encoding (zstd)
+            supported = tuple(map(int, httpx.__version__.split(".")[:2])) >= (0, 27)
+        except ImportError:
+            supported = False
+        if not supported:
+            raise ImportError(
+                "HTTP2Adapter requires httpx 0.27 or later with HTTP/2 support, "
+                "install with `pip install spatula[http2]`"
+            )
+        self.pool_size = pool_size
+        self.fallback = fallback or HTTPAdapter()
+        # certificate verification is configured per client
+        self._clients: typing.Dict[typing.Any, "httpx.Client"] = {}
+
+    def _client(self, verify: typing.Union[bool, str]) -> "httpx.Client":
+        import httpx
+
+        if verify not in self._clients:
+            self._clients[verify] = httpx.Client(
+                http2=True,
+                verify=verify,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                # redirects, cookies, and retries are handled by the session
+                follow_redirects=False,
+                trust_env=False,
+            )
+        return self._clients[verify]
+
+    def send(  # type: ignore
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: typing.Any = None,
+        verify: typing.Union[bool, str] = True,
+        cert: typing.Any = None,
+        proxies: typing.Optional[typing.Mapping[str, str]] = None,
+    ) -> requests.Response:
+        if cert or select_proxy(request.url, proxies):  # type: ignore
+            return self.fallback.send(
+                request,
+                stream=stream,
+                timeout=timeout,
+                verify=verify,
+                cert=cert,
+                proxies=proxies,
+            )
+
+        import httpx
+
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            httpx_timeout = httpx.Timeout(read, connect=connect)
+        else:
+            httpx_timeout = httpx.Timeout(timeout)
+        client = self._client(verify)
+        try:
+            httpx_request = client.build_request(
+                request.method or "GET",
+                request.url or "",
+                headers=list(request.headers.items()),
+                content=request.body,
+                timeout=httpx_timeout,
+            )
+            httpx_response = client.send(httpx_request, stream=True)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.reason = httpx_response.reason_phrase
+        response.headers = CaseInsensitiveDict(httpx_response.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = str(httpx_response.url)
+        response.raw = _HTTPXBody(httpx_response)
+        response.request = request
+        response.connection = self  # type: ignore
+        return response
+
+    def close(self) -> None:
+        for client in self._clients.values():
+            client.close()
+        self._clients.clear()
+        self.fallback.close()
+
+
+def configure_transport(
+    session: requests.Session, *, http2: bool = False, pool_size: int = 10
+) -> None:
+    """
+    replace the HTTP(S) adapters of `session` (e.g. a `Scraper`), should be called
+    before any other adapters (such as `record_responses`) are mounted
+
+    :param http2: Use `HTTP2Adapter` for HTTPS requests.
+    :param pool_size: Connections to keep open to each host, increase this if
+        requests to a host are made from more than ten threads at once.  With
+        `http2`, HTTPS connections are instead limited to this many in total, since
+        each HTTP/2 connection carries many requests at once.
+    """
+    http = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", http)
+    if http2:
+        # HTTP/2 is only negotiated over TLS
+        session.mount("https://", HTTP2Adapter(pool_size, fallback=http))
+    else:
+        session.mount("https://", http)
@@ -1,20 +1,37 @@
+import hashlib
+import json
 import pprint
+import sys
 import typing
 import dataclasses
-from lxml.etree import _Element  # type: ignore
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from lxml.etree import _Element  # type: ignore
+
 
 # utilities for working with optional dependencies
-try:
-    from attr import has as attr_has
-    from attr import fields as attr_fields
-    from attr import asdict as attr_asdict
-except ImportError:  # pragma: no cover
-    attr_has = lambda x: False  # type: ignore # noqa
-    attr_fields = lambda x: []  # type: ignore # noqa
-    attr_asdict = lambda x: {}  # type: ignore # noqa
+# an attrs class can only exist if attrs has already been imported, so checking
+# sys.modules avoids paying to import attrs when it isn't in use
+def attr_has(cls: typing.Any) -> bool:
+    attr = sys.modules.get("attr")
+    return attr is not None and attr.has(cls)
+
+
+def attr_fields(cls: typing.Any) -> typing.Any:
+    return sys.modules["attr"].fields(cls)
+
+
+def attr_asdict(obj: typing.Any) -> typing.Dict[str, typing.Any]:
+    return sys.modules["attr"].asdict(obj)
 
 
-def _display_element(obj: _Element) -> str:
+def _is_element(obj: typing.Any) -> bool:
+    # if lxml hasn't been imported, obj can't be an lxml element
+    etree = sys.modules.get("lxml.etree")
+    return etree is not None and isinstance(obj, etree._Element)
+
+
+def _display_element(obj: "_Element") -> str:
     elem_str = f"<{obj.tag} "
 
     if id_str := obj.get("id"):
@@ -32,7 +49,7 @@ def _is_pydantic(obj: typing.Any) -> bool:
 
 
 def _display(obj: typing.Any) -> str:
-    if isinstance(obj, _Element):
+    if _is_element(obj):
         return _display_element(obj)
     else:
         # if there's a dict representation, use that, otherwise str
@@ -42,14 +59,67 @@ def _display(obj: typing.Any) -> str:
             return str(obj)
 
 
+# values that can be copied into a dict as-is, anything else (nested objects,
+# containers) is left to the generic (recursive, copying) asdict functions
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+def _fields_converter(
+    names: typing.Tuple[str, ...],
+    asdict: typing.Callable[[typing.Any], typing.Dict[str, typing.Any]],
+) -> typing.Callable[[typing.Any], typing.Dict[str, typing.Any]]:
+    def to_dict(obj: typing.Any) -> typing.Dict[str, typing.Any]:
+        data = {name: getattr(obj, name) for name in names}
+        for value in data.values():
+            if type(value) not in _SCALARS:
+                return asdict(obj)
+        return data
+
+    return to_dict
+
+
+def _pydantic_dict(obj: typing.Any) -> typing.Dict[str, typing.Any]:
+    return obj.dict()
+
+
+_Converter = typing.Callable[[typing.Any], typing.Dict[str, typing.Any]]
+_converters: typing.Dict[type, typing.Optional[_Converter]] = {}
+
+
+def _dict_converter(cls: type) -> typing.Optional[_Converter]:
+    """
+    function that converts instances of cls to a dict, looked up once per type
+    since scrapes typically produce many instances of a handful of types
+    """
+    if cls in _converters:
+        return _converters[cls]
+    converter: typing.Optional[_Converter] = None
+    if dataclasses.is_dataclass(cls):
+        names = tuple(f.name for f in dataclasses.fields(cls))
+        converter = _fields_converter(names, dataclasses.asdict)
+    elif attr_has(cls):
+        names = tuple(a.name for a in attr_fields(cls))
+        converter = _fields_converter(names, attr_asdict)
+    elif _is_pydantic(cls):
+        converter = _pydantic_dict
+    _converters[cls] = converter
+    return converter
+
+
 def _obj_to_dict(obj: typing.Any) -> typing.Optional[typing.Dict]:
     if obj is None or isinstance(obj, dict):
         return obj
-    elif dataclasses.is_dataclass(obj):
-        return dataclasses.asdict(obj)
-    elif attr_has(obj):
-        return attr_asdict(obj)
-    elif _is_pydantic(obj):
-        return obj.dict()
-    else:
+    to_dict = _dict_converter(type(obj))
+    if to_dict is None:
         raise ValueError(f"invalid type: {obj} ({type(obj)})")
+    return to_dict(obj)
+
+
+def _content_hash(data: typing.Any) -> str:
+    """
+    stable hash of JSON-compatible data, independent of dictionary ordering
+    """
+    encoded = json.dumps(
+        data, sort_keys=True, separators=(",", ":"), default=str
+    ).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
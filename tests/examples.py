@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from spatula import Page, NullSource, ListPage
+from spatula import Page, NullSource, ListPage, HtmlPage, JsonPage
 
 
 class ExampleListPage(ListPage):
@@ -72,3 +72,74 @@ class SimpleInputPage(Page):
 
 class ExampleInputPage(SimpleInputPage):
     example_input = Input("Tony", 65)
+
+
+class ExampleFailingPage(Page):
+    # yields some records then fails, to test partial output
+    source = NullSource()
+
+    def process_page(self):
+        yield {"val": "1"}
+        yield {"val": "2"}
+        raise ValueError("scrape failed partway through")
+
+
+class ExampleJsonFilePage(JsonPage):
+    # used with --source-dir, where each file becomes the source
+    def process_page(self):
+        return self.data
+
+
+class ExampleTitlePage(HtmlPage):
+    # used with --replay, so example.com is never actually fetched
+    example_source = "https://example.com/title"
+
+    def process_page(self):
+        return {"title": self.root.findtext(".//title")}
+
+
+class ExampleInterruptedPage(Page):
+    # as if Ctrl-C were pressed partway through a scrape
+    source = NullSource()
+
+    def process_page(self):
+        yield {"val": "1"}
+        yield {"val": "2"}
+        raise KeyboardInterrupt
+
+
+class ExampleReusedItemPage(Page):
+    # modifies each item after yielding it, which shouldn't affect the output
+    source = NullSource()
+
+    def process_page(self):
+        item = {}
+        for val in ("1", "2", "3"):
+            item["val"] = val
+            yield item
+
+
+class ExampleNestedReusedItemPage(Page):
+    # modifies a nested list after yielding each item
+    source = NullSource()
+
+    def process_page(self):
+        vals = []
+        for val in ("1", "2", "3"):
+            vals.append(val)
+            yield {"val": val, "seen": vals}
+
+
+class ExampleNestedPage(Page):
+    # a tree of subpages, scraped in a different order with each --order
+    source = NullSource()
+
+    def process_page(self):
+        name = self.input or "x"
+        yield {"val": name}
+        if len(name) < 3:
+            yield ExampleNestedPage(name + "a")
+            yield ExampleNestedPage(name + "b")
+
+    def get_priority(self):
+        return (self.input or "").count("b")
@@ -0,0 +1,144 @@
+import gzip
+import io
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from spatula.archive import (
+    ResponseArchive,
+    record_responses,
+    replay_responses,
+    request_fingerprint,
+)
+from spatula.scraper import Scraper
+from spatula.sources import URL
+
+
+class EchoAdapter(BaseAdapter):
+    """adapter that responds with a description of each request"""
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 404 if "missing" in request.url else 200
+        response.headers["Content-Type"] = "text/plain"
+        response.headers["Content-Encoding"] = "gzip"
+        response._content = f"{request.method} {request.url} {request.body}".encode()
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def recording_scraper(archive):
+    scraper = Scraper(requests_per_minute=0, raise_errors=False)
+    scraper.mount("http://", EchoAdapter())
+    record_responses(scraper, archive)
+    return scraper
+
+
+def test_request_fingerprint():
+    assert request_fingerprint("get", "http://a") == request_fingerprint(
+        "GET", "http://a"
+    )
+    assert request_fingerprint("GET", "http://a") != request_fingerprint(
+        "GET", "http://b"
+    )
+    assert request_fingerprint("POST", "http://a", "x=1") == request_fingerprint(
+        "POST", "http://a", b"x=1"
+    )
+    assert request_fingerprint("POST", "http://a", "x=1") != request_fingerprint(
+        "POST", "http://a", "x=2"
+    )
+
+
+def test_archive_records_responses(tmp_path):
+    path = str(tmp_path / "responses.gz")
+    with ResponseArchive(path) as archive:
+        scraper = recording_scraper(archive)
+        scraper.get("http://example.com/1")
+        scraper.post("http://example.com/2", data={"x": "1"})
+        scraper.get("http://example.com/missing")
+
+    # the archive is a valid (multi-member) gzip file
+    assert gzip.decompress(open(path, "rb").read()).count(b"http://example.com") == 6
+
+    archive = ResponseArchive(path)
+    assert len(archive) == 3
+    response = archive.get(request_fingerprint("POST", "http://example.com/2", "x=1"))
+    assert response.status_code == 200
+    assert response.text == "POST http://example.com/2 x=1"
+    assert response.headers["Content-Type"] == "text/plain"
+    # body is stored decoded
+    assert "Content-Encoding" not in response.headers
+    missing = archive.get(request_fingerprint("GET", "http://example.com/missing"))
+    assert missing.status_code == 404
+    assert archive.get(request_fingerprint("GET", "http://example.com/3")) is None
+
+
+class StreamingAdapter(BaseAdapter):
+    """adapter with a body that can only be read incrementally from `raw`"""
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b"x" * 3_000_000)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_archive_records_streamed_responses(tmp_path, monkeypatch):
+    path = str(tmp_path / "responses.gz")
+    with ResponseArchive(path) as archive:
+        scraper = Scraper(requests_per_minute=0)
+        scraper.mount("http://", StreamingAdapter())
+        record_responses(scraper, archive)
+        # the body is never read into memory
+        monkeypatch.setattr(gzip, "compress", None)
+        response = URL("http://example.com/big", stream=True).get_response(scraper)
+        monkeypatch.undo()
+    assert response.spool.read() == b"x" * 3_000_000
+    with pytest.raises(RuntimeError):
+        response.content
+
+    archive = ResponseArchive(path)
+    recorded = archive.get(request_fingerprint("GET", "http://example.com/big"))
+    assert recorded.content == b"x" * 3_000_000
+
+
+def test_archive_appends(tmp_path):
+    path = str(tmp_path / "responses.gz")
+    for n in range(2):
+        with ResponseArchive(path) as archive:
+            recording_scraper(archive).get(f"http://example.com/{n}")
+            recording_scraper(archive).get("http://example.com/same")
+    archive = ResponseArchive(path)
+    # repeated requests are indexed by their most recent response
+    assert len(archive) == 3
+    assert sum(1 for _ in open(archive.index_path)) == 4
+    assert archive.get(request_fingerprint("GET", "http://example.com/0")).text
+
+
+def test_replay_responses(tmp_path):
+    path = str(tmp_path / "responses.gz")
+    with ResponseArchive(path) as archive:
+        scraper = recording_scraper(archive)
+        scraper.get("http://example.com/1")
+        scraper.post("http://example.com/2", data={"x": "1"})
+
+    with ResponseArchive(path) as archive:
+        scraper = Scraper(requests_per_minute=0)
+        replay_responses(scraper, archive)
+        assert (
+            scraper.get("http://example.com/1").text == "GET http://example.com/1 None"
+        )
+        response = scraper.post("http://example.com/2", data={"x": "1"})
+        assert response.text == "POST http://example.com/2 x=1"
+        # same URL, different body
+        with pytest.raises(requests.ConnectionError):
+            scraper.post("http://example.com/2", data={"x": "2"})
@@ -0,0 +1,60 @@
+import json
+from spatula.changes import (
+    load_scout_records,
+    index_scout_records,
+    diff_scout_indexes,
+)
+
+
+def test_load_scout_records_json_and_jsonl(tmp_path):
+    records = [{"data": {"a": 1}, "__next__": None}, {"data": {}, "__next__": "P"}]
+    json_path = tmp_path / "scout.json"
+    json_path.write_text(json.dumps(records, indent=2))
+    jsonl_path = tmp_path / "scout.jsonl"
+    jsonl_path.write_text("".join(json.dumps(r) + "\n" for r in records))
+    assert list(load_scout_records(str(json_path))) == records
+    assert list(load_scout_records(str(jsonl_path))) == records
+
+
+def test_index_scout_records_keys():
+    index = index_scout_records(
+        [
+            {"data": {"v": 1}, "__next__": "Detail source=a"},
+            {"data": {"v": 2}, "__next__": None},
+            {"data": {"v": 3}, "__next__": "Detail source=b"},
+            {"data": {"v": 4}, "__next__": "Detail source=b"},
+        ]
+    )
+    # unique subpages are keyed by __next__, others fall back to the data hash
+    assert "Detail source=a" in index
+    assert "Detail source=b" not in index
+    assert len(index) == 4
+    assert len([k for k in index if k.startswith("Detail source=b #")]) == 2
+
+
+def test_diff_scout_indexes():
+    previous = index_scout_records(
+        [
+            {"data": {"v": 1}, "__next__": "Detail source=a"},
+            {"data": {"v": 2}, "__next__": "Detail source=b"},
+        ]
+    )
+    current = index_scout_records(
+        [
+            {"data": {"v": 1}, "__next__": "Detail source=a"},
+            {"data": {"v": 20}, "__next__": "Detail source=b"},
+            {"data": {"v": 3}, "__next__": "Detail source=c"},
+        ]
+    )
+    diff = diff_scout_indexes(previous, current)
+    assert [e["key"] for e in diff["added"]] == ["Detail source=c"]
+    assert diff["removed"] == []
+    assert [e["key"] for e in diff["changed"]] == ["Detail source=b"]
+    assert diff["changed"][0]["__hash__"] == current["Detail source=b"][0]
+
+
+def test_index_uses_existing_hash():
+    index = index_scout_records(
+        [{"data": {"v": 1}, "__next__": "Detail source=a", "__hash__": "abc"}]
+    )
+    assert index == {"Detail source=a": ("abc", "Detail source=a")}
@@ -1,8 +1,19 @@
 import datetime
 import json
+import sys
 from pathlib import Path
+import pytest
+import requests
 from click.testing import CliRunner
-from spatula.cli import cli
+from spatula.archive import ResponseArchive
+from spatula.cli import (
+    cli,
+    get_scraper,
+    _init_worker,
+    _warn_unstable_filenames,
+    _worker,
+)
+from spatula.scraper import ThrottlingAdapter
 
 
 def test_shell_command():
@@ -82,6 +93,454 @@ def test_scrape_command_source_flag():
             assert "https://httpbin.org" in f.read()
 
 
+def test_scrape_command_reused_item():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli, ["scrape", "tests.examples.ExampleReusedItemPage", "-o", "out"]
+        )
+        assert result.exit_code == 0, result.output
+        vals = sorted(json.loads(p.read_text())["val"] for p in Path("out").iterdir())
+        assert vals == ["1", "2", "3"]
+
+
+def test_scrape_command_reused_nested_item():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli, ["scrape", "tests.examples.ExampleNestedReusedItemPage", "-o", "out"]
+        )
+        assert result.exit_code == 0, result.output
+        items = sorted(
+            (json.loads(p.read_text()) for p in Path("out").iterdir()),
+            key=lambda item: item["val"],
+        )
+        assert [item["seen"] for item in items] == [["1"], ["1", "2"], ["1", "2", "3"]]
+
+
+@pytest.mark.parametrize(
+    "order,expected",
+    [
+        ("dfs", ["x", "xa", "xaa", "xab", "xb", "xba", "xbb"]),
+        ("bfs", ["x", "xa", "xb", "xaa", "xab", "xba", "xbb"]),
+        ("priority", ["x", "xb", "xbb", "xba", "xa", "xab", "xaa"]),
+    ],
+)
+def test_scrape_command_order(order, expected):
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli,
+            [
+                "scrape",
+                "tests.examples.ExampleNestedPage",
+                "--order",
+                order,
+                "--manifest",
+                "-o",
+                "out",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        # the manifest lists items in the order they were written
+        with open("out/manifest.jsonl") as f:
+            paths = [json.loads(line)["path"] for line in f]
+        vals = [json.loads((Path("out") / path).read_text())["val"] for path in paths]
+        assert vals == expected
+
+
+def test_scrape_command_fsync_and_queue_size(monkeypatch):
+    import spatula.cli
+    from spatula.output import ItemWriter
+
+    writers = []
+
+    class RecordingItemWriter(ItemWriter):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            writers.append((kwargs, self._queue.maxsize))
+
+    monkeypatch.setattr(spatula.cli, "ItemWriter", RecordingItemWriter)
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli,
+            [
+                "scrape",
+                "tests.examples.ExampleListPage",
+                "-o",
+                "out",
+                "--fsync",
+                "2",
+                "--queue-size",
+                "3",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert "success: wrote 5 objects to out" in result.output
+        [(kwargs, maxsize)] = writers
+        assert (kwargs["fsync"], kwargs["max_queued"], maxsize) == (2, 3, 3)
+        vals = sorted(json.loads(p.read_text())["val"] for p in Path("out").iterdir())
+        assert vals == ["1", "2", "3", "4", "5"]
+
+
+def test_scrape_command_interrupted():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli, ["scrape", "tests.examples.ExampleInterruptedPage", "-o", "out"]
+        )
+        assert result.exit_code == 130
+        assert "interrupted: wrote 2 objects to out" in result.output
+        vals = sorted(json.loads(p.read_text())["val"] for p in Path("out").iterdir())
+        assert vals == ["1", "2"]
+
+
+@pytest.mark.parametrize(
+    "workers,dump", [("1", "json"), ("2", "json"), ("2", "orjson")]
+)
+def test_scrape_command_source_dir(workers, dump):
+    if dump == "orjson":
+        pytest.importorskip("orjson")
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        Path("saved").mkdir()
+        for i in range(5):
+            Path(f"saved/{i}.json").write_text(json.dumps({"val": i}))
+        Path("saved/ignored.txt").write_text("ignored")
+        result = runner.invoke(
+            cli,
+            [
+                "scrape",
+                "tests.examples.ExampleJsonFilePage",
+                "--source-dir",
+                "saved",
+                "--source-pattern",
+                "*.json",
+                "--workers",
+                workers,
+                "--dump",
+                dump,
+                "-o",
+                "out",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert "success: wrote 5 objects to out" in result.output
+        vals = sorted(json.loads(p.read_text())["val"] for p in Path("out").iterdir())
+        assert vals == [0, 1, 2, 3, 4]
+
+
+def test_source_dir_worker_scraper_options():
+    _init_worker(
+        "tests.examples.ExampleJsonFilePage",
+        {"user_agent": "custom", "rpm": 5, "timeout": 2, "header": ["X-Test: 1"]},
+        None,
+    )
+    scraper = _worker["scraper"]
+    assert scraper.user_agent == "custom"
+    assert scraper.requests_per_minute == 5
+    assert scraper.timeout == 2
+    assert scraper.headers["X-Test"] == "1"
+
+
+def test_scrape_command_source_dir_workers_rejects_profile():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        Path("saved").mkdir()
+        result = runner.invoke(
+            cli,
+            [
+                "scrape",
+                "tests.examples.ExampleJsonFilePage",
+                "--source-dir",
+                "saved",
+                "--workers",
+                "2",
+                "--profile",
+            ],
+        )
+        assert result.exit_code == 1
+        assert (
+            "--profile can't be used with --source-dir and --workers" in result.output
+        )
+
+
+def test_scrape_command_dedupe_and_skip_unchanged():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        Path("saved").mkdir()
+        for i in range(6):
+            Path(f"saved/{i}.json").write_text(json.dumps({"val": i % 3}))
+        args = [
+            "scrape",
+            "tests.examples.ExampleJsonFilePage",
+            "--source-dir",
+            "saved",
+            "--dedupe",
+            "--dedupe-key",
+            "val",
+            "-o",
+            "out",
+        ]
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        assert "success: wrote 3 objects to out" in result.output
+        assert "skipped 3 duplicate objects" in result.output
+
+        # keyed filenames are stable, so a re-run only writes what changed
+        Path("saved/0.json").write_text(json.dumps({"val": 0, "new": True}))
+        result = runner.invoke(cli, args + ["--skip-unchanged"])
+        assert result.exit_code == 0, result.output
+        assert "success: wrote 1 objects to out" in result.output
+        assert "skipped 2 unchanged objects" in result.output
+        assert len(list(Path("out").iterdir())) == 3
+
+
+def test_scrape_command_layout_type():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        Path("saved").mkdir()
+        for i in range(3):
+            Path(f"saved/{i}.json").write_text(json.dumps({"val": i}))
+        result = runner.invoke(
+            cli,
+            [
+                "scrape",
+                "tests.examples.ExampleJsonFilePage",
+                "--source-dir",
+                "saved",
+                "--layout",
+                "type",
+                "-o",
+                "out",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert len(list(Path("out/dict").iterdir())) == 3
+        with open("out/manifest.jsonl") as f:
+            paths = [json.loads(line)["path"] for line in f]
+        assert sorted(paths) == sorted(
+            f"dict/{p.name}" for p in Path("out/dict").iterdir()
+        )
+
+
+def test_scrape_command_update():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        Path("saved").mkdir()
+        for i in range(3):
+            Path(f"saved/{i}.json").write_text(json.dumps({"val": i}))
+        args = [
+            "scrape",
+            "tests.examples.ExampleJsonFilePage",
+            "--source-dir",
+            "saved",
+            "--dedupe-key",
+            "val",
+            "--update",
+            "-o",
+            "out",
+        ]
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        assert "success: wrote 3 objects to out" in result.output
+
+        Path("saved/0.json").write_text(json.dumps({"val": 0, "new": True}))
+        Path("saved/2.json").unlink()
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        assert "success: wrote 1 objects to out" in result.output
+        assert "skipped 1 unchanged objects" in result.output
+        assert "removed 1 objects that are no longer present" in result.output
+        assert len(list(Path("out").glob("*.json"))) == 2
+
+
+def test_scrape_command_update_only_changed_keeps_unvisited_items():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        args = ["scrape", "tests.examples.ExampleListPageSubpages", "--update"]
+        args += ["--dedupe-key", "val", "-o", "out"]
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        # a diff in which only the subpage for val 1 was added
+        result = runner.invoke(cli, ["scout", "tests.examples.ExampleListPageSubpages"])
+        assert result.exit_code == 0
+        with open("scout.json") as f:
+            previous = json.load(f)[1:]
+        with open("previous.json", "w") as f:
+            json.dump(previous, f)
+        result = runner.invoke(
+            cli,
+            [
+                "scout",
+                "tests.examples.ExampleListPageSubpages",
+                "--compare",
+                "previous.json",
+            ],
+        )
+        assert result.exit_code == 0
+
+        result = runner.invoke(cli, args + ["--only-changed", "scout-diff.json"])
+        assert result.exit_code == 0, result.output
+        assert "skipped 1 unchanged objects" in result.output
+        assert "removed" not in result.output
+        assert len(list(Path("out").glob("*.json"))) == 5
+        assert not Path("out/tombstones.jsonl").exists()
+        with open("out/manifest.jsonl") as f:
+            assert len(f.readlines()) == 5
+
+
+def test_scrape_command_update_warns_unstable_filenames():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        args = ["scrape", "tests.examples.ExampleListPage", "--update", "-o", "out"]
+        _warn_unstable_filenames.cache_clear()
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        assert result.output.count("some items have no key") == 1
+        _warn_unstable_filenames.cache_clear()
+        result = runner.invoke(cli, args + ["--dedupe-key", "val"])
+        assert "some items have no key" not in result.output
+
+
+def test_scrape_command_update_requires_manifest():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        Path("out").mkdir()
+        Path("out/item.json").write_text("{}")
+        result = runner.invoke(
+            cli, ["scrape", "tests.examples.ExamplePage", "--update", "-o", "out"]
+        )
+        assert result.exit_code == 1
+        assert "out has no manifest.jsonl" in result.output
+
+
+def write_archive(path, url, content):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "text/html"
+    response._content = content
+    response.request = requests.Request("GET", url).prepare()
+    with ResponseArchive(path) as archive:
+        archive.append(response)
+
+
+def test_get_scraper_adaptive():
+    scraper = get_scraper(rpm=30, adaptive=True, max_rpm=120)
+    for prefix in ("http://", "https://"):
+        adapter = scraper.get_adapter(prefix)
+        assert isinstance(adapter, ThrottlingAdapter)
+        assert adapter.throttle.requests_per_minute == 30
+        assert adapter.throttle.max_requests_per_minute == 120
+    assert not isinstance(get_scraper().get_adapter("https://"), ThrottlingAdapter)
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["test", "tests.examples.ExamplePage", "--adaptive", "--max-rpm", "120"]
+    )
+    assert result.exit_code == 0, result.output
+
+
+def test_http2_requires_httpx(monkeypatch):
+    runner = CliRunner()
+    # as if httpx weren't installed
+    monkeypatch.setitem(sys.modules, "httpx", None)
+
+    result = runner.invoke(
+        cli, ["test", "tests.examples.ExamplePage", "--http2", "--pool-size", "20"]
+    )
+    assert result.exit_code == 1
+    assert "--http2 requires httpx 0.27 or later" in result.output
+    assert isinstance(result.exception, SystemExit)
+
+    result = runner.invoke(
+        cli, ["test", "tests.examples.ExamplePage", "--pool-size", "20"]
+    )
+    assert result.exit_code == 0, result.output
+
+
+def test_test_command_replay_and_record():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        write_archive(
+            "a.gz", "https://example.com/title", b"<title>from archive</title>"
+        )
+        result = runner.invoke(
+            cli,
+            [
+                "test",
+                "tests.examples.ExampleTitlePage",
+                "--replay",
+                "a.gz",
+                "--record",
+                "b.gz",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert "from archive" in result.output
+        # the replayed response was recorded again
+        assert len(ResponseArchive("b.gz")) == 1
+
+        result = runner.invoke(
+            cli,
+            [
+                "test",
+                "tests.examples.ExampleTitlePage",
+                "--source",
+                "https://example.com/other",
+                "--replay",
+                "b.gz",
+            ],
+        )
+        assert result.exit_code == 1
+        assert "no response to GET https://example.com/other" in str(result.exception)
+
+
+def test_scrape_command_archive_and_replay(monkeypatch):
+    runner = CliRunner()
+
+    def respond(adapter, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/html"
+        response._content = b"<title>recorded</title>"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def blocked(adapter, request, **kwargs):
+        raise requests.ConnectionError(f"network blocked: {request.url}")
+
+    args = ["scrape", "tests.examples.ExampleTitlePage", "-s", "https://example.com/t"]
+    with runner.isolated_filesystem():
+        monkeypatch.setattr(requests.adapters.HTTPAdapter, "send", respond)
+        result = runner.invoke(cli, args + ["-o", "live", "--archive", "a.gz"])
+        assert result.exit_code == 0, result.output
+        assert len(ResponseArchive("a.gz")) == 1
+
+        monkeypatch.setattr(requests.adapters.HTTPAdapter, "send", blocked)
+        result = runner.invoke(cli, args + ["-o", "replayed", "--replay", "a.gz"])
+        assert result.exit_code == 0, result.output
+        live = [json.loads(p.read_text()) for p in Path("live").iterdir()]
+        replayed = [json.loads(p.read_text()) for p in Path("replayed").iterdir()]
+        assert live == replayed == [{"title": "recorded"}]
+
+
 def test_scout_command_basic():
     runner = CliRunner()
 
@@ -113,6 +572,103 @@ def test_scout_command_subpages():
             }
 
 
+def test_scout_command_matches_json_dump():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli, ["scout", "tests.examples.ExampleListPageSubpages"])
+        assert result.exit_code == 0
+        with open("scout.json") as f:
+            output = f.read()
+        assert output == json.dumps(json.loads(output), indent=2)
+
+
+def test_scout_command_jsonl_hash():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli,
+            ["scout", "tests.examples.ExampleListPage", "--format", "jsonl", "--hash"],
+        )
+        assert result.exit_code == 0
+        assert "success: wrote 5 records to scout.json" in result.output
+
+        with open("scout.json") as f:
+            records = [json.loads(line) for line in f]
+        assert len(records) == 5
+        assert records[0]["data"] == {"val": "1"}
+        assert len({r["__hash__"] for r in records}) == 5
+
+
+def test_scout_command_interrupted():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli, ["scout", "tests.examples.ExampleFailingPage"])
+        assert result.exit_code == 1
+        # records scouted before the failure are kept & the file is valid JSON
+        with open("scout.json") as f:
+            data = json.load(f)
+        assert [r["data"] for r in data] == [{"val": "1"}, {"val": "2"}]
+
+
+def test_scout_command_module_workers():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli, ["scout", "tests.examples", "--workers", "2"])
+        assert result.exit_code == 0
+        assert "success: wrote 10 records to scout.json" in result.output
+
+
+def test_scout_compare_and_scrape_only_changed():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli, ["scout", "tests.examples.ExampleListPageSubpages"])
+        assert result.exit_code == 0
+        # simulate a previous run where val 1 didn't exist and val 2 differed
+        with open("scout.json") as f:
+            previous = json.load(f)
+        previous = previous[1:]
+        previous[0]["data"] = {"val": "22"}
+        with open("previous.json", "w") as f:
+            json.dump(previous, f)
+
+        result = runner.invoke(
+            cli,
+            [
+                "scout",
+                "tests.examples.ExampleListPageSubpages",
+                "--compare",
+                "previous.json",
+            ],
+        )
+        assert result.exit_code == 0
+        assert "2 added, 1 removed, 0 changed" in result.output
+        with open("scout-diff.json") as f:
+            diff = json.load(f)
+        assert len(diff["added"]) == 2
+
+        result = runner.invoke(
+            cli,
+            [
+                "scrape",
+                "tests.examples.ExampleListPageSubpages",
+                "--only-changed",
+                "scout-diff.json",
+                "-o",
+                "out",
+            ],
+        )
+        assert result.exit_code == 0
+        assert "success: wrote 2 objects to out" in result.output
+        # output files are named by uuid, so compare contents
+        vals = sorted(json.loads(p.read_text())["val"] for p in Path("out").iterdir())
+        assert vals == ["1", "2"]
+
+
 def test_test_command_basic():
     runner = CliRunner()
 
@@ -222,3 +778,42 @@ def test_test_command_input_with_example():
     )
     assert result.exit_code == 0
     assert "{'name': 'Tony', 'number': 65}" in result.output
+
+
+def test_scrape_command_profile():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli, ["scrape", "tests.examples.ExampleListPage", "-o", "out", "--profile"]
+        )
+        assert result.exit_code == 0
+        assert "ExampleListPage" in result.output
+        assert "wrote profile to out.profile.json" in result.output
+        with open("out.profile.json") as f:
+            assert json.load(f)["ExampleListPage"]["items"] == 5
+        # report is not written into the output directory
+        assert len(list(Path("out").iterdir())) == 5
+
+
+def test_scrape_command_metrics_port():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli,
+            ["scrape", "tests.examples.ExampleListPage", "--metrics-port", "0"],
+        )
+        assert result.exit_code == 0
+        assert "serving metrics on port" in result.output
+
+
+def test_scrape_command_module_workers():
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        result = runner.invoke(
+            cli, ["scrape", "tests.examples", "-o", "out", "--workers", "2"]
+        )
+        assert result.exit_code == 0
+        assert "success: wrote 10 objects to out" in result.output
@@ -0,0 +1,49 @@
+import json
+import subprocess
+import sys
+import pytest
+
+# modules that are slow to import and should only be loaded once they're used
+HEAVY_MODULES = ["lxml", "openpyxl", "requests", "scrapelib", "attr", "http.server"]
+
+
+def loaded_after(code):
+    script = (
+        f"import sys, json\n{code}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ["spatula", "spatula.cli"])
+def test_import_is_lazy(module):
+    assert loaded_after(f"import {module}") == []
+
+
+def test_version_is_lazy():
+    code = (
+        "from spatula.cli import cli\n"
+        "try:\n"
+        "    cli(['--version'])\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    assert loaded_after(code) == []
+
+
+def test_json_page_does_not_load_other_parsers():
+    code = (
+        "from spatula import JsonListPage\n"
+        "class Page(JsonListPage):\n"
+        "    pass\n"
+        "class Response:\n"
+        "    def json(self):\n"
+        "        return []\n"
+        "p = Page(source='https://example.com')\n"
+        "p.response = Response()\n"
+        "p.postprocess_response()"
+    )
+    assert loaded_after(code) == []
@@ -0,0 +1,132 @@
+import urllib.request
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+from spatula import Page, NullSource, URL, add_hook, remove_hook
+from spatula.metrics import MetricsCollector, serve_metrics
+from spatula.scraper import Scraper
+from .examples import ExampleListPageSubpages
+
+
+class LocalAdapter(BaseAdapter):
+    """adapter that responds to every request locally with the given status"""
+
+    def __init__(self, status=200):
+        super().__init__()
+        self.status = status
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = self.status
+        response._content = b"{}"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def local_scraper(status=200, **kwargs):
+    scraper = Scraper(**kwargs)
+    scraper.mount("http://", LocalAdapter(status))
+    return scraper
+
+
+def test_collector_counts_items_and_queue():
+    with MetricsCollector() as collector:
+        list(ExampleListPageSubpages().do_scrape())
+    assert collector.items == 5
+    assert collector.queue_depth == 0
+    # NullSource pages make no requests
+    assert collector.requests == 0
+
+
+def test_collector_counts_items_as_they_are_produced():
+    class LongListPage(Page):
+        source = NullSource()
+
+        def process_page(self):
+            for i in range(3):
+                yield {"val": i}
+
+    with MetricsCollector() as collector:
+        counts = [collector.items for _ in LongListPage().do_scrape()]
+    # not only once the page is finished
+    assert counts == [1, 2, 3]
+
+
+@pytest.mark.parametrize("order", ["dfs", "bfs"])
+def test_queue_events_count_pending_pages(order):
+    sizes = []
+
+    def hook(event, page, **data):
+        if event == "queue":
+            sizes.append(data["size"])
+
+    add_hook(hook)
+    try:
+        list(ExampleListPageSubpages().do_scrape(order=order))
+    finally:
+        remove_hook(hook)
+    if order == "dfs":
+        # nothing is pending, subpages are scraped as they're yielded
+        assert sizes == []
+    else:
+        assert sizes == [0, 4, 3, 2, 1, 0]
+
+
+def test_collector_counts_errors_by_status():
+    class ErrorPage(Page):
+        source = URL("http://example.com/missing")
+
+        def process_page(self):
+            pass
+
+        def process_error_response(self, exception):
+            pass
+
+    with MetricsCollector() as collector:
+        list(ErrorPage().do_scrape(local_scraper(404, requests_per_minute=0)))
+    assert collector.requests == 1
+    assert collector.responses == {"404": 1}
+    assert 'spatula_errors_total{status="404"} 1' in collector.render()
+
+
+def test_collector_throttle_waits():
+    scraper = local_scraper(requests_per_minute=6000)
+    with MetricsCollector() as collector:
+        for _ in range(3):
+            scraper.get("http://example.com/")
+    # first request is never delayed
+    assert collector.throttle_waits == {"example.com": 2}
+    assert collector.throttle_seconds["example.com"] > 0
+
+
+def test_serve_metrics():
+    collector = MetricsCollector()
+    server = serve_metrics(collector, 0, "127.0.0.1")
+    try:
+        port = server.server_address[1]
+        with collector:
+            list(ExampleListPageSubpages().do_scrape())
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as resp:
+            body = resp.read().decode()
+        assert "# TYPE spatula_items_total counter" in body
+        assert "spatula_items_total 5" in body
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_null_source_page_not_counted():
+    class NullPage(Page):
+        source = NullSource()
+
+        def process_page(self):
+            return {}
+
+    with MetricsCollector() as collector:
+        list(NullPage().do_scrape())
+    assert collector.requests == 0
+    assert collector.items == 1
@@ -0,0 +1,217 @@
+import io
+import json
+import os
+import threading
+from dataclasses import dataclass
+import pytest
+from spatula.output import (
+    ItemWriter,
+    item_key,
+    item_path,
+    json_dump,
+    load_manifest,
+    orjson_dump,
+)
+
+
+@dataclass
+class Item:
+    name: str
+    value: int
+
+
+@dataclass
+class KeyedItem:
+    id: int
+    name: str
+
+    def get_key(self):
+        return self.id
+
+
+DATA = {"name": "Ünïcode", "values": [1, 2.5, None, True], "nested": {"a": "b"}}
+
+
+def test_json_dump_matches_stdlib():
+    expected = io.StringIO()
+    json.dump(DATA, expected)
+    f = io.StringIO()
+    json_dump(DATA, f)
+    assert f.getvalue() == expected.getvalue()
+
+
+def test_orjson_dump():
+    pytest.importorskip("orjson")
+    f = io.StringIO()
+    orjson_dump(DATA, f)
+    assert json.loads(f.getvalue()) == DATA
+
+
+def test_item_writer(tmp_path):
+    with ItemWriter(tmp_path) as writer:
+        for i in range(100):
+            writer.write(f"item{i}", Item("x", i) if i % 2 else {"value": i})
+    assert writer.count == 100
+    assert json.loads((tmp_path / "item7.json").read_text()) == {
+        "name": "x",
+        "value": 7,
+    }
+    assert json.loads((tmp_path / "item8.json").read_text()) == {"value": 8}
+
+
+def test_item_writer_error(tmp_path):
+    writer = ItemWriter(tmp_path)
+    writer.write("good", {"value": 1})
+    writer.write("bad", object())
+    with pytest.raises(ValueError):
+        writer.close()
+    assert writer.count == 1
+
+
+def test_item_writer_fsync_batches(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    with ItemWriter(tmp_path, fsync=10) as writer:
+        for i in range(25):
+            writer.write(str(i), {"value": i})
+    # 25 files, plus the directory after each of the 3 batches
+    assert len(synced) == 28
+    assert len(list(tmp_path.iterdir())) == 25
+
+
+def test_item_writer_fsync_large_batch(tmp_path):
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (256, hard))
+    try:
+        # a batch larger than the number of files that can be open at once
+        with ItemWriter(tmp_path, fsync=5000) as writer:
+            for i in range(500):
+                writer.write(str(i), {"value": i})
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    assert writer.count == 500
+
+
+def test_item_writer_backpressure(tmp_path):
+    release = threading.Event()
+
+    def slow_dump(data, f):
+        release.wait()
+        json_dump(data, f)
+
+    writer = ItemWriter(tmp_path, slow_dump, max_queued=2)
+    # the first item is taken by the writer, two more fill the queue
+    for i in range(3):
+        writer.write(str(i), {"value": i})
+    blocked = threading.Thread(target=writer.write, args=("3", {"value": 3}))
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()
+    release.set()
+    blocked.join()
+    writer.close()
+    assert writer.count == 4
+
+
+def test_item_key():
+    assert item_key(KeyedItem(1, "a")) == "KeyedItem:1"
+    assert item_key({"id": 1}) is None
+    assert item_key({"id": 1}, "id") == "dict:1"
+    assert item_key(Item("x", 1), "value") == "Item:1"
+    assert item_key({"other": 1}, "id") is None
+
+
+def test_item_writer_dedupe(tmp_path):
+    items = [KeyedItem(1, "a"), KeyedItem(1, "b"), {"x": 1}, {"x": 1}, {"x": 2}]
+    with ItemWriter(tmp_path, dedupe=True) as writer:
+        for i, item in enumerate(items):
+            writer.write(str(i), item, item_key(item))
+    assert writer.count == 3
+    assert writer.duplicates == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["0.json", "2.json", "4.json"]
+
+
+def test_item_writer_skip_unchanged(tmp_path):
+    with ItemWriter(tmp_path) as writer:
+        writer.write("same", {"value": 1})
+        writer.write("changed", {"value": 2})
+    os.utime(tmp_path / "same.json", (0, 0))
+
+    with ItemWriter(tmp_path, skip_unchanged=True) as writer:
+        writer.write("same", {"value": 1})
+        writer.write("changed", {"value": 3})
+        writer.write("new", {"value": 4})
+    assert writer.count == 2
+    assert writer.unchanged == 1
+    assert (tmp_path / "same.json").stat().st_mtime == 0
+    assert json.loads((tmp_path / "changed.json").read_text()) == {"value": 3}
+
+
+def test_item_path():
+    assert item_path("abc", {}) == "abc"
+    assert item_path("abc", Item("x", 1), "type") == "Item/abc"
+    shard, name = item_path("abc", {}, "hash").split("/")
+    assert name == "abc"
+    assert len(shard) == 2
+    assert item_path("abc", {"other": 1}, "hash") == item_path("abc", {}, "hash")
+
+
+def test_item_writer_manifest(tmp_path):
+    with ItemWriter(tmp_path, manifest=True) as writer:
+        for i in range(10):
+            item = KeyedItem(i, "x")
+            writer.write(item_path(str(i), item, "hash"), item, item_key(item))
+    entries = [json.loads(line) for line in open(tmp_path / "manifest.jsonl")]
+    assert len(entries) == 10
+    assert entries[3]["key"] == "KeyedItem:3"
+    for entry in entries:
+        assert json.loads((tmp_path / entry["path"]).read_text())["name"] == "x"
+
+
+def write_keyed(writer, items):
+    for item in items:
+        writer.write(str(item.id), item, item_key(item))
+
+
+def test_item_writer_update(tmp_path):
+    with ItemWriter(tmp_path, manifest=True) as writer:
+        write_keyed(writer, [KeyedItem(1, "a"), KeyedItem(2, "b"), KeyedItem(3, "c")])
+
+    previous = load_manifest(tmp_path)
+    with ItemWriter(tmp_path, previous=previous) as writer:
+        write_keyed(writer, [KeyedItem(1, "a"), KeyedItem(2, "changed")])
+    assert (writer.count, writer.unchanged, writer.removed) == (1, 1, 1)
+    assert not (tmp_path / "3.json").exists()
+    assert set(load_manifest(tmp_path)) == {"1.json", "2.json"}
+    with open(tmp_path / "tombstones.jsonl") as f:
+        tombstone = json.loads(f.read())
+    assert tombstone["path"] == "3.json"
+    assert tombstone["key"] == "KeyedItem:3"
+
+
+def test_item_writer_update_incomplete(tmp_path):
+    with ItemWriter(tmp_path, manifest=True) as writer:
+        write_keyed(writer, [KeyedItem(1, "a"), KeyedItem(2, "b")])
+
+    writer = ItemWriter(tmp_path, previous=load_manifest(tmp_path))
+    write_keyed(writer, [KeyedItem(1, "a")])
+    writer.close(complete=False)
+    # items that weren't reached are kept
+    assert writer.removed == 0
+    assert (tmp_path / "2.json").exists()
+    assert set(load_manifest(tmp_path)) == {"1.json", "2.json"}
+
+
+def test_item_writer_keeps_manifest_until_closed(tmp_path):
+    with ItemWriter(tmp_path, manifest=True) as writer:
+        write_keyed(writer, [KeyedItem(1, "a"), KeyedItem(2, "b")])
+
+    writer = ItemWriter(tmp_path, previous=load_manifest(tmp_path))
+    write_keyed(writer, [KeyedItem(1, "a")])
+    # e.g. if the scrape is killed, the previous manifest is still intact
+    assert set(load_manifest(tmp_path)) == {"1.json", "2.json"}
+    writer.close()
+    assert set(load_manifest(tmp_path)) == {"1.json"}
+    assert not (tmp_path / "manifest.jsonl.tmp").exists()
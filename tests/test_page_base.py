@@ -1,15 +1,25 @@
 import logging
+import threading
+import tracemalloc
 import pytest
+import requests
 from spatula import (
     Page,
     ListPage,
     MissingSourceError,
     HandledError,
     NullSource,
+    URL,
     SkipItem,
     RejectedResponse,
+    Source,
+    BatchSource,
+    add_hook,
+    remove_hook,
     config,
 )
+from spatula.pages import _iter_pages, _pack, _unpack
+from spatula.sources import _make_response
 from scrapelib import HTTPError, Scraper
 from .examples import ExamplePaginatedPage
 
@@ -49,6 +59,7 @@ def test_page_init_and_str():
         == f"DummyPage(input={INPUT} source={SOURCE})"
     )
     assert DummyPage().logger == logging.getLogger("tests.test_page_base.DummyPage")
+    assert "logger" not in DummyPage().__dict__
 
 
 def test_fetch_data_dependencies():
@@ -89,6 +100,20 @@ def test_fetch_data_sets_response():
     assert p.response == f"dummy response for {SOURCE}"
 
 
+def test_fetch_data_encoding_without_response():
+    class EncodedNullPage(Page):
+        source = NullSource()
+        encoding = "utf-8"
+
+        def process_page(self):
+            return "processed"
+
+    p = EncodedNullPage()
+    p._fetch_data(DummyScraper())
+    assert p.response is None
+    assert p.process_page() == "processed"
+
+
 def test_fetch_data_handle_error_response():
     class ErrorPage(DummyPage):
         _error_was_called = False
@@ -306,3 +331,316 @@ def test_skip_item_on_detail_page(caplog):
         items = list(page.do_scrape())
     assert items == [2, 4]
     assert len(caplog.records) == 9  # 6 null fetches, 3 skips
+
+
+class CountingSource(NullSource):
+    def __init__(self, count):
+        self.count = count
+
+
+class DeepPaginatedPage(Page):
+    source = CountingSource(1)
+
+    def process_page(self):
+        yield {"page": self.source.count}
+
+    def get_next_source(self):
+        if self.source.count < 5000:
+            return CountingSource(self.source.count + 1)
+
+
+@pytest.mark.parametrize("order", ["dfs", "bfs"])
+def test_deep_pagination_no_recursion(order):
+    items = list(DeepPaginatedPage().do_scrape(order=order))
+    assert len(items) == 5000
+    assert items[-1] == {"page": 5000}
+
+
+class NestedPage(Page):
+    source = NullSource()
+
+    def process_page(self):
+        yield f"{self.input}-item"
+        if len(self.input) < 3:
+            yield NestedPage(self.input + "a")
+            yield NestedPage(self.input + "b")
+
+
+def test_traversal_order_dfs():
+    items = list(NestedPage("x").do_scrape(order="dfs"))
+    assert items == [
+        "x-item",
+        "xa-item",
+        "xaa-item",
+        "xab-item",
+        "xb-item",
+        "xba-item",
+        "xbb-item",
+    ]
+
+
+def test_traversal_order_bfs():
+    items = list(NestedPage("x").do_scrape(order="bfs"))
+    assert items == [
+        "x-item",
+        "xa-item",
+        "xb-item",
+        "xaa-item",
+        "xab-item",
+        "xba-item",
+        "xbb-item",
+    ]
+
+
+@pytest.mark.parametrize("order", ["dfs", "bfs"])
+def test_traversal_follow(order):
+    # only the initial page's subpages are filtered, deeper subpages always followed
+    items = list(
+        NestedPage("x")._to_items(
+            Scraper(), order=order, follow=lambda page: page.input == "xb"
+        )
+    )
+    assert items == ["x-item", "xb-item", "xba-item", "xbb-item"]
+
+
+def test_pack_unpack_pending_pages():
+    page = DummyPage({"a": 1}, source=URL("https://example.com"))
+    work = _pack(page)
+    assert work == (DummyPage, {"a": 1}, "https://example.com")
+    page = _unpack(work)
+    assert isinstance(page, DummyPage)
+    assert page.input == {"a": 1}
+    assert page.source == "https://example.com"
+
+    # sources with non-default options are kept as-is
+    source = URL("https://example.com", method="POST")
+    assert _pack(DummyPage(source=source)) == (DummyPage, None, source)
+
+    # as are pages with any other state
+    page = DummyPage()
+    page.extra = True
+    assert _pack(page) is page
+    assert _unpack(page) is page
+
+
+class InitPage(DummyPage):
+    def __init__(self, input_val=None, **kwargs):
+        super().__init__(input_val, **kwargs)
+        # state that _unpack couldn't restore
+        type(self).initialized += 1
+
+    initialized = 0
+
+
+def test_pack_keeps_pages_with_custom_init():
+    page = InitPage({"a": 1})
+    assert _pack(page) is page
+
+
+class LargeSource(Source):
+    # a 1MB response per page, without any network access
+    retries = 0
+
+    def __init__(self, count):
+        self.count = count
+
+    def get_response(self, scraper):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"x" * 1_000_000
+        return response
+
+
+class LargePaginatedPage(Page):
+    source = LargeSource(1)
+
+    def process_page(self):
+        yield len(self.response.content)
+
+    def get_next_source(self):
+        # still has its response while computing the next source
+        assert self.response
+        if self.source.count < 30:
+            return LargeSource(self.source.count + 1)
+
+
+class ReleasingLargePaginatedPage(LargePaginatedPage):
+    release_response = True
+
+
+@pytest.mark.parametrize("release", [True, False])
+def test_release_response_bounds_memory(release):
+    # something holding on to every page, e.g. a hook or the caller's own references
+    retained = []
+
+    def hook(event, page, **data):
+        if event == "process_page":
+            retained.append(page)
+
+    page = ReleasingLargePaginatedPage() if release else LargePaginatedPage()
+    add_hook(hook)
+    tracemalloc.start()
+    try:
+        items = list(page.do_scrape(Scraper()))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        remove_hook(hook)
+    assert items == [1_000_000] * 30
+    assert len(retained) == 30
+    if release:
+        assert peak < 5_000_000
+        assert not any(hasattr(p, "response") for p in retained)
+    else:
+        assert peak > 30_000_000
+
+
+def test_release_response_config(monkeypatch):
+    monkeypatch.setattr(config, "RELEASE_RESPONSES", True)
+    page = LargePaginatedPage()
+    list(page._process(Scraper(), False))
+    assert not hasattr(page, "response")
+
+
+def test_traversal_order_invalid():
+    with pytest.raises(ValueError):
+        list(NestedPage("x").do_scrape(order="random"))
+
+
+class ArchivedDetail(Page):
+    source = NullSource()
+
+    def process_page(self):
+        return f"detail-{self.input['year']}-{self.input['list']}"
+
+    def get_priority(self):
+        # recent years are more valuable
+        return self.input["year"] - 2000
+
+
+class PriorityListPage(Page):
+    source = NullSource()
+    priority = 100
+
+    def process_page(self):
+        yield f"list-{self.input}"
+        for year in (2001, 2020, 2010):
+            yield ArchivedDetail({"year": year, "list": self.input})
+        if self.input == "first":
+            yield PriorityListPage("second")
+
+
+def test_traversal_order_priority():
+    items = list(PriorityListPage("first").do_scrape(order="priority"))
+    # both list pages before any detail page, then detail pages by priority
+    # with ties broken in favor of the deepest page
+    assert items == [
+        "list-first",
+        "list-second",
+        "detail-2020-second",
+        "detail-2020-first",
+        "detail-2010-second",
+        "detail-2010-first",
+        "detail-2001-second",
+        "detail-2001-first",
+    ]
+
+
+def test_get_priority_default():
+    assert DummyPage().get_priority() == 0
+    assert PriorityListPage().get_priority() == 100
+
+
+class BarrierPage(Page):
+    """page that can only finish if all of its siblings are running concurrently"""
+
+    source = NullSource()
+
+    def process_page(self):
+        self.input["barrier"].wait(timeout=5)
+        yield self.input["n"]
+        yield self.input["n"] * 10
+
+
+def test_iter_pages_concurrently():
+    barrier = threading.Barrier(3)
+    pages = [BarrierPage({"barrier": barrier, "n": n}) for n in (1, 2, 3)]
+    items = list(_iter_pages(pages, Scraper(), workers=3))
+    assert sorted(items) == [1, 2, 3, 10, 20, 30]
+    assert not barrier.broken
+
+
+def test_iter_pages_sequential_order():
+    items = list(_iter_pages([FirstPage(), FirstPage()], Scraper()))
+    assert items == list(FirstPage().do_scrape()) * 2
+
+
+def test_iter_pages_error_propagates():
+    class ErrorPage(Page):
+        source = NullSource()
+
+        def process_page(self):
+            raise ValueError("oops")
+
+    with pytest.raises(ValueError):
+        list(_iter_pages([ErrorPage(), FirstPage()], Scraper(), workers=2))
+
+
+def test_iter_pages_early_exit():
+    pages = [DeepPaginatedPage(), DeepPaginatedPage()]
+    items = _iter_pages(pages, Scraper(), workers=2)
+    assert next(iter(items)) == {"page": 1}
+    # closing the generator stops the worker threads
+    items.close()
+    assert not any(t.name.startswith("spatula") for t in threading.enumerate())
+
+
+class KeysSource(Source):
+    def __init__(self, keys, requests):
+        self.keys = keys
+        self.requests = requests
+
+    def get_response(self, scraper):
+        self.requests.append(self.keys)
+        return _make_response("batch", ",".join(self.keys).encode())
+
+
+class SplitSource(BatchSource):
+    requests = []
+
+    def get_batch_source(self, keys):
+        return KeysSource(keys, self.requests)
+
+    def split_response(self, response, keys):
+        return {key: key.upper().encode() for key in response.text.split(",")}
+
+
+class BatchedDetail(Page):
+    def process_page(self):
+        return self.response.text
+
+
+class BatchingPage(Page):
+    source = NullSource()
+    batch_size = 2
+
+    def process_page(self):
+        for key in "abcde":
+            yield BatchedDetail(source=SplitSource(key))
+        yield "list"
+
+
+@pytest.mark.parametrize("order", ["dfs", "bfs"])
+def test_batched_subpages(order, monkeypatch):
+    monkeypatch.setattr(SplitSource, "requests", [])
+    items = list(BatchingPage().do_scrape(order=order))
+    assert sorted(items) == ["A", "B", "C", "D", "E", "list"]
+    assert SplitSource.requests == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_batch_size_unset(monkeypatch):
+    monkeypatch.setattr(SplitSource, "requests", [])
+    monkeypatch.setattr(BatchingPage, "batch_size", None)
+    items = list(BatchingPage().do_scrape())
+    assert items == ["A", "B", "C", "D", "E", "list"]
+    assert SplitSource.requests == [["a"], ["b"], ["c"], ["d"], ["e"]]
@@ -1,6 +1,14 @@
+import gzip
+import io
 import json
+import tarfile
+import tempfile
+import zipfile
 from dataclasses import dataclass
+import pytest
 from spatula import (
+    ArchiveListPage,
+    Source,
     HtmlPage,
     XmlPage,
     JsonPage,
@@ -11,6 +19,7 @@ from spatula import (
     XPath,
     URL,
 )
+from spatula.sources import _make_response
 
 SOURCE = "https://example.com"
 
@@ -27,6 +36,20 @@ class Response:
         return json.loads(self.content)
 
 
+@dataclass
+class SpooledResponse:
+    # as returned by URL(stream=True), content is not available
+    spool: tempfile.NamedTemporaryFile
+    encoding: str = "utf-8"
+
+
+def spooled(content):
+    spool = tempfile.NamedTemporaryFile()
+    spool.write(content)
+    # postprocess_response is responsible for seeking to the start
+    return SpooledResponse(spool)
+
+
 def test_html_page():
     class ConcreteHtmlPage(HtmlPage):
         def process_page(self):
@@ -67,13 +90,50 @@ def test_json_page():
 
 def test_csv_list_page():
     p = CsvListPage(source=SOURCE)
-    p.response = Response("a,b,c\n1,2,3\n4,5,6")
+    p.response = Response(b"a,b,c\n1,2,3\n4,5,6")
     p.postprocess_response()
     data = list(p.process_page())
     assert len(data) == 2
     assert data[0] == {"a": "1", "b": "2", "c": "3"}
 
 
+def test_csv_list_page_detects_utf8():
+    class UndeclaredResponse(Response):
+        encoding = None
+
+        @property
+        def apparent_encoding(self):
+            raise AssertionError("character set detection is not needed")
+
+    p = CsvListPage(source=SOURCE)
+    p.response = UndeclaredResponse("name\nJosé".encode("utf-8"))
+    p.postprocess_response()
+    assert list(p.process_page()) == [{"name": "José"}]
+
+
+def test_page_encoding():
+    class Cp1252CsvPage(CsvListPage):
+        encoding = "cp1252"
+
+    class Cp1252HtmlPage(HtmlPage):
+        encoding = "cp1252"
+
+        def process_page(self):
+            return self.root.text_content()
+
+    content = "name\nJosé".encode("cp1252")
+    for response in (Response(content), spooled(content)):
+        p = Cp1252CsvPage(source=SOURCE)
+        p.response = response
+        p.postprocess_response()
+        assert list(p.process_page()) == [{"name": "José"}]
+
+    p = Cp1252HtmlPage(source=SOURCE)
+    p.response = Response("<html><p>José</p></html>".encode("cp1252"))
+    p.postprocess_response()
+    assert p.process_page() == "José"
+
+
 def test_html_list_page():
     p = HtmlListPage(source=SOURCE)
     p.selector = XPath("//li/text()")
@@ -101,3 +161,147 @@ def test_json_list_page():
     p.postprocess_response()
     data = list(p.process_page())
     assert data == ["one", "two", "three"]
+
+
+def test_pages_read_spooled_responses():
+    class SpooledXmlPage(XmlPage):
+        def process_page(self):
+            pass
+
+    class SpooledJsonPage(JsonPage):
+        def process_page(self):
+            pass
+
+    class SpooledCsvPage(CsvListPage):
+        def process_item(self, item):
+            return item
+
+    class SpooledHtmlPage(HtmlPage):
+        def process_page(self):
+            pass
+
+    p = SpooledXmlPage(source=SOURCE)
+    p.response = spooled(b"<data><is><nested /></is></data>")
+    p.postprocess_response()
+    assert p.root.tag == "data"
+
+    p = SpooledJsonPage(source=SOURCE)
+    p.response = spooled(b'{"data": 1}')
+    p.postprocess_response()
+    assert p.data == {"data": 1}
+
+    p = SpooledCsvPage(source=SOURCE)
+    p.response = spooled("a,b\n1,ñ\n3,4".encode())
+    p.postprocess_response()
+    assert list(p.process_page()) == [{"a": "1", "b": "ñ"}, {"a": "3", "b": "4"}]
+
+    p = SpooledHtmlPage(source=URL(SOURCE))
+    p.response = spooled(b"<html><a href='/test'>link</a></html>")
+    p.postprocess_response()
+    assert p.root.xpath("//a")[0].get("href") == "https://example.com/test"
+
+
+def _zip(files):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return buf.getvalue()
+
+
+def _tar_gz(files):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tf.addfile(info, io.BytesIO(content))
+    return buf.getvalue()
+
+
+ARCHIVE_FILES = {
+    "a.csv": b"name,num\na,1\nb,2",
+    "readme.txt": b"not a csv",
+    "dir/c.csv": b"name,num\nc,3",
+}
+
+
+class BytesSource(Source):
+    retries = 0
+
+    def __init__(self, url, body, stream=False):
+        self.url = url
+        self.body = body
+        self.stream = stream
+
+    def get_response(self, scraper):
+        body = self.body
+        if self.stream:
+            body = tempfile.NamedTemporaryFile()
+            body.write(self.body)
+        return _make_response(self.url, body)
+
+    def __str__(self):
+        return self.url
+
+
+class MemberCsv(CsvListPage):
+    def process_item(self, item):
+        return {"file": self.source.name, **item}
+
+
+class CsvArchive(ArchiveListPage):
+    member_page = MemberCsv
+    member_pattern = "*.csv"
+
+
+EXPECTED_ROWS = [
+    {"file": "a.csv", "name": "a", "num": "1"},
+    {"file": "a.csv", "name": "b", "num": "2"},
+    {"file": "dir/c.csv", "name": "c", "num": "3"},
+]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("stream", [False, True])
+def test_archive_list_page_zip(workers, stream):
+    class Archive(CsvArchive):
+        pass
+
+    Archive.workers = workers
+    source = BytesSource("https://example.com/a.zip", _zip(ARCHIVE_FILES), stream)
+    assert list(Archive(source=source).do_scrape()) == EXPECTED_ROWS
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_archive_list_page_tar(stream):
+    source = BytesSource("https://example.com/a.tgz", _tar_gz(ARCHIVE_FILES), stream)
+    assert list(CsvArchive(source=source).do_scrape()) == EXPECTED_ROWS
+
+
+def test_archive_list_page_gzip():
+    source = BytesSource(
+        "https://example.com/data/c.csv.gz", gzip.compress(b"name,num\nc,3")
+    )
+    assert list(CsvArchive(source=source).do_scrape()) == [
+        {"file": "c.csv", "name": "c", "num": "3"}
+    ]
+
+
+def test_archive_list_page_members_as_sources():
+    class Names(ArchiveListPage):
+        def process_item(self, item):
+            return str(item)
+
+    source = BytesSource("https://example.com/a.zip", _zip(ARCHIVE_FILES))
+    assert list(Names(source=source).do_scrape()) == [
+        "https://example.com/a.zip#a.csv",
+        "https://example.com/a.zip#readme.txt",
+        "https://example.com/a.zip#dir/c.csv",
+    ]
+
+
+def test_archive_list_page_not_an_archive():
+    source = BytesSource("https://example.com/a.zip", b"nope")
+    with pytest.raises(ValueError):
+        list(CsvArchive(source=source).do_scrape())
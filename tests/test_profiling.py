@@ -0,0 +1,89 @@
+import lxml.html
+from spatula import (
+    Page,
+    ListPage,
+    NullSource,
+    SkipItem,
+    CSS,
+    Profiler,
+    add_hook,
+    remove_hook,
+)
+
+
+class Detail(Page):
+    source = NullSource()
+
+    def process_page(self):
+        return {"n": self.input}
+
+
+class OddEvenList(ListPage):
+    source = NullSource()
+
+    def postprocess_response(self):
+        self.root = lxml.html.fromstring("<ul><li>1</li><li>2</li><li>3</li></ul>")
+
+    def process_page(self):
+        items = CSS("li").match(self.root)
+        yield from self._process_or_skip_loop(int(li.text) for li in items)
+
+    def process_item(self, item):
+        if item == 2:
+            raise SkipItem("two")
+        elif item == 3:
+            return Detail(item)
+        return {"n": item}
+
+
+def test_profiler_collects_stats():
+    with Profiler() as profiler:
+        items = list(OddEvenList().do_scrape())
+    assert items == [{"n": 1}, {"n": 3}]
+
+    stats = profiler.to_dict()
+    assert stats["OddEvenList"]["fetches"] == 1
+    assert stats["OddEvenList"]["pages"] == 1
+    assert stats["OddEvenList"]["items"] == 1
+    assert stats["OddEvenList"]["subpages"] == 1
+    assert stats["OddEvenList"]["skips"] == 1
+    assert stats["OddEvenList"]["process_item_calls"] == 3
+    assert stats["OddEvenList"]["selector_calls"] == 1
+    assert stats["Detail"]["items"] == 1
+    assert stats["Detail"]["selector_calls"] == 0
+
+
+def test_profiler_summary():
+    with Profiler() as profiler:
+        list(OddEvenList().do_scrape())
+    lines = profiler.summary().splitlines()
+    assert lines[0].split()[0] == "page"
+    assert lines[1].startswith("Detail ")
+    assert lines[2].startswith("OddEvenList ")
+
+
+def test_profiler_removed_on_exit():
+    with Profiler() as profiler:
+        pass
+    list(OddEvenList().do_scrape())
+    assert profiler.stats == {}
+
+
+def test_custom_hook():
+    events = []
+
+    def hook(event, page, **data):
+        if event != "queue":
+            events.append((event, page.__class__.__name__))
+
+    add_hook(hook)
+    try:
+        list(Detail(1).do_scrape())
+    finally:
+        remove_hook(hook)
+    assert events == [
+        ("fetch", "Detail"),
+        ("postprocess", "Detail"),
+        ("item", "Detail"),
+        ("process_page", "Detail"),
+    ]
@@ -0,0 +1,133 @@
+import threading
+import time
+import requests
+from requests.adapters import BaseAdapter
+from spatula.metrics import MetricsCollector
+from spatula.scraper import (
+    AdaptiveThrottle,
+    Scraper,
+    _retry_after,
+    throttle_requests,
+)
+
+
+class SlowAdapter(BaseAdapter):
+    """adapter that takes `seconds` to respond with `status`, tracking concurrency"""
+
+    def __init__(self, status=200, seconds=0.0, headers=None):
+        super().__init__()
+        self.status = status
+        self.seconds = seconds
+        self.headers = headers or {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.seconds)
+        with self.lock:
+            self.in_flight -= 1
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers.update(self.headers)
+        response._content = b"{}"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def response(status, **headers):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers)
+    return resp
+
+
+def test_retry_after():
+    assert _retry_after(response(429, **{"Retry-After": "3"})) == 3
+    assert (
+        _retry_after(response(429, **{"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}))
+        == 0
+    )
+    assert _retry_after(response(429, **{"Retry-After": "soon"})) is None
+    assert _retry_after(response(200)) is None
+
+
+def test_adaptive_throttle_aimd():
+    throttle = AdaptiveThrottle(60000, max_requests_per_minute=10**6, max_concurrency=4)
+    for _ in range(10):
+        throttle.acquire("a")
+        throttle.release("a", 0.01, response(200))
+    rate, concurrency = throttle.limits("a")
+    assert rate == 60010
+    assert concurrency == 4
+
+    throttle.acquire("a")
+    throttle.release("a", 0.01, response(503))
+    assert throttle.limits("a") == (30005, 2)
+    # other hosts are unaffected
+    assert throttle.limits("b") == (60000, 1)
+
+
+def test_adaptive_throttle_slow_response_and_errors():
+    throttle = AdaptiveThrottle(60000, max_requests_per_minute=10**6)
+    throttle.acquire("a")
+    throttle.release("a", 0.01, response(200))
+    throttle.acquire("a")
+    throttle.release("a", 1, response(200))
+    assert throttle.limits("a")[0] == 30000.5
+
+    throttle = AdaptiveThrottle(60000, max_requests_per_minute=10**6)
+    throttle.acquire("a")
+    throttle.release("a", 0.01, None)
+    assert throttle.limits("a")[0] == 30000
+    # clamped to the minimum
+    throttle = AdaptiveThrottle(1)
+    throttle.acquire("a")
+    throttle.release("a", 0.01, response(429))
+    assert throttle.limits("a")[0] == 1
+
+
+def test_adaptive_throttle_retry_after():
+    throttle = AdaptiveThrottle(60000, max_requests_per_minute=10**6)
+    throttle.acquire("a")
+    throttle.release("a", 0.01, response(429, **{"Retry-After": "0.2"}))
+    assert throttle.acquire("a") >= 0.15
+
+
+def test_throttle_requests_limits_concurrency():
+    adapter = SlowAdapter(seconds=0.02)
+    scraper = Scraper(requests_per_minute=60)
+    scraper.mount("http://", adapter)
+    throttle_requests(
+        scraper,
+        AdaptiveThrottle(600000, max_requests_per_minute=10**6, max_concurrency=2),
+    )
+    # the fixed rate limit is replaced
+    assert scraper.requests_per_minute == 0
+
+    def fetch():
+        for _ in range(3):
+            scraper.get("http://example.com/")
+
+    with MetricsCollector() as collector:
+        threads = [threading.Thread(target=fetch) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert adapter.max_in_flight == 2
+    assert collector.host_rates["example.com"] == 600018
+    assert collector.host_concurrency["example.com"] == 2
+    assert 'spatula_host_concurrency{host="example.com"} 2' in collector.render()
+
+
+def test_scraper_accept_encoding(monkeypatch):
+    monkeypatch.setattr("urllib3.util.request.ACCEPT_ENCODING", "gzip,deflate,br,zstd")
+    assert Scraper().headers["Accept-Encoding"] == "gzip, deflate, br, zstd"
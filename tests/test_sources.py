@@ -1,6 +1,11 @@
+import io
+import json
+import urllib.parse
 import pytest
-from spatula import URL
-from scrapelib import Scraper
+import requests
+from requests.adapters import BaseAdapter
+from spatula import URL, NullSource, FileSource, DirectorySource, BatchSource
+from scrapelib import HTTPError, Scraper
 
 
 def test_source_no_timeout():
@@ -12,3 +17,124 @@ def test_source_timeout():
     source = URL("https://httpbin.org/delay/1", timeout=0.1)
     with pytest.raises(OSError):
         source.get_response(Scraper())
+
+
+def test_sources_are_slotted():
+    assert not hasattr(URL("https://example.com"), "__dict__")
+    assert not hasattr(NullSource(), "__dict__")
+
+
+class StreamingAdapter(BaseAdapter):
+    """adapter with a body that can only be read incrementally from `raw`"""
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b"x" * 3_000_000)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_source_stream_spools_to_disk():
+    scraper = Scraper()
+    scraper.mount("http://", StreamingAdapter())
+    response = URL("http://example.com", stream=True).get_response(scraper)
+    assert response.spool.read() == b"x" * 3_000_000
+    with pytest.raises(RuntimeError):
+        response.content
+
+
+def test_file_source(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_bytes(b"<html></html>")
+    response = FileSource(str(path)).get_response(Scraper())
+    assert response.content == b"<html></html>"
+    assert response.headers["Content-Type"] == "text/html"
+
+    response = FileSource(str(path), stream=True).get_response(Scraper())
+    assert response.spool.read() == b"<html></html>"
+
+
+def test_directory_source(tmp_path):
+    (tmp_path / "sub").mkdir()
+    for name in ("b.html", "a.html", "c.txt", "sub/d.html"):
+        (tmp_path / name).write_text(name)
+    assert [s.path for s in DirectorySource(str(tmp_path), "*.html")] == [
+        str(tmp_path / "a.html"),
+        str(tmp_path / "b.html"),
+    ]
+    assert len(list(DirectorySource(str(tmp_path), "**/*.html"))) == 3
+    # like NullSource, nothing to fetch
+    assert DirectorySource(str(tmp_path)).get_response(Scraper()) is None
+
+
+class LookupAdapter(BaseAdapter):
+    """adapter for an API returning a record for each of the POSTed ids"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        ids = urllib.parse.parse_qs(request.body)["ids"][0].split(",")
+        self.requests.append(ids)
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = json.dumps(
+            [{"id": id, "name": id.upper()} for id in ids if id != "missing"]
+        ).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class LookupSource(BatchSource):
+    def get_batch_source(self, keys):
+        return URL(
+            "http://example.com/lookup", method="POST", data={"ids": ",".join(keys)}
+        )
+
+    def split_response(self, response, keys):
+        return {record["id"]: json.dumps(record).encode() for record in response.json()}
+
+
+def test_batch_source():
+    scraper = Scraper()
+    adapter = LookupAdapter()
+    scraper.mount("http://", adapter)
+    response = LookupSource("a").get_response(scraper)
+    assert response.json() == {"id": "a", "name": "A"}
+    assert response.headers["Content-Type"] == "application/json"
+    assert adapter.requests == [["a"]]
+    assert str(LookupSource("a")) == "LookupSource('a')"
+
+
+def test_batch_source_missing_key():
+    scraper = Scraper()
+    scraper.mount("http://", LookupAdapter())
+    with pytest.raises(HTTPError) as e:
+        LookupSource("missing").get_response(scraper)
+    assert e.value.response.status_code == 404
+
+
+def test_batch_source_shared_keys_and_retries():
+    from spatula.sources import _Batch
+
+    scraper = Scraper()
+    adapter = LookupAdapter()
+    scraper.mount("http://", adapter)
+    sources = [LookupSource("a"), LookupSource("b"), LookupSource("a")]
+    _Batch(sources)
+    assert [s.get_response(scraper).json()["id"] for s in sources] == ["a", "b", "a"]
+    assert adapter.requests == [["a", "b"]]
+    # fetching a source again (e.g. after its response was rejected) makes a new request
+    assert sources[0].get_response(scraper).json()["id"] == "a"
+    assert adapter.requests == [["a", "b"], ["a"]]
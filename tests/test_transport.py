@@ -0,0 +1,67 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from spatula.scraper import Scraper
+from spatula.transport import configure_transport
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps(
+            {"path": self.path, "cookie": self.headers.get("Cookie")}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Set-Cookie", "session=1; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_configure_transport_pool_size():
+    scraper = Scraper()
+    configure_transport(scraper, pool_size=32)
+    for prefix in ("http://", "https://"):
+        assert scraper.get_adapter(prefix)._pool_maxsize == 32
+
+
+def test_http2_adapter(server_url):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    from spatula.transport import HTTP2Adapter
+
+    scraper = Scraper(requests_per_minute=0)
+    # HTTP/2 is only used for https:// by configure_transport, but the adapter
+    # itself works with either (using HTTP/1.1 without TLS)
+    scraper.mount("http://", HTTP2Adapter(pool_size=2))
+
+    response = scraper.get(server_url + "/first")
+    assert response.status_code == 200
+    assert response.encoding == "utf-8"
+    assert response.json() == {"path": "/first", "cookie": None}
+    # cookies are stored by the session
+    assert scraper.get(server_url + "/second").json()["cookie"] == "session=1"
+    assert scraper.post(server_url + "/", data={"q": "1"}).text == "q=1"
+
+    response = scraper.get(server_url + "/streamed", stream=True)
+    assert json.loads(b"".join(response.iter_content(4)))["path"] == "/streamed"
@@ -1,8 +1,8 @@
 import pprint
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 import pytest
 import lxml.html
-from spatula.utils import _display
+from spatula.utils import _display, _content_hash, _obj_to_dict
 
 try:
     import attr
@@ -78,3 +78,29 @@ def test_display_attr():
 
     d = AttrDemo("word", 42)
     assert _display(d) == "{'a': 'word', 'b': 42}"
+
+
+def test_content_hash_stable():
+    assert _content_hash({"a": 1, "b": [1, 2]}) == _content_hash({"b": [1, 2], "a": 1})
+    assert _content_hash({"a": 1}) != _content_hash({"a": 2})
+
+
+def test_obj_to_dict_nested_dataclass():
+    @dataclass
+    class Inner:
+        x: int
+
+    @dataclass
+    class Outer:
+        name: str
+        inner: Inner
+        tags: list
+
+    flat = Inner(1)
+    nested = Outer("a", Inner(2), [Inner(3)])
+    assert _obj_to_dict(flat) == {"x": 1}
+    assert _obj_to_dict(nested) == asdict(nested)
+    # nested values are copies, as with asdict
+    assert _obj_to_dict(nested)["tags"] is not nested.tags
+    with pytest.raises(ValueError):
+        _obj_to_dict(object())